@@ -1,7 +1,7 @@
 """ImmAgent - Immutable Agent Architecture.
 
 A Python library implementing immutable agents where every state transition
-creates a new agent with a fresh UUID4.
+creates a new agent with a fresh UUID.
 """
 
 from immagent.assets import SystemPrompt
@@ -15,7 +15,7 @@ from immagent.exceptions import (
     ToolExecutionError,
     ValidationError,
 )
-from immagent.llm import Model
+from immagent.llm import Model, ResponseCache
 from immagent.mcp import MCPManager
 from immagent.messages import Message, ToolCall
 from immagent.persistent import PersistentAgent
@@ -35,6 +35,7 @@ __all__ = [
     "MCPManager",
     # Models
     "Model",
+    "ResponseCache",
     # Exceptions
     "ImmAgentError",
     "AssetNotFoundError",
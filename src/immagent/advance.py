@@ -16,6 +16,59 @@ if TYPE_CHECKING:
     from immagent.mcp import MCPManager
 
 
+async def _execute_tool_call(
+    mcp: "MCPManager",
+    tc: messages.ToolCall,
+    read_only_results: dict[tuple[str, str], asyncio.Future[str]],
+) -> messages.Message:
+    """Run one tool call, returning its result (or error) as a tool message.
+
+    Read-only tools share one execution per name and arguments through
+    read_only_results, including with identical calls running concurrently
+    in the same round. Failed executions are dropped so a later round retries.
+    """
+    key = (tc.name, tc.arguments)
+    try:
+        if mcp.is_read_only(tc.name):
+            pending = read_only_results.get(key)
+            if pending is None:
+                pending = asyncio.ensure_future(mcp.execute(tc.name, tc.arguments))
+                read_only_results[key] = pending
+            try:
+                result = await pending
+            except exc.ToolExecutionError:
+                if read_only_results.get(key) is pending:
+                    del read_only_results[key]
+                raise
+        else:
+            result = await mcp.execute(tc.name, tc.arguments)
+    except exc.ToolExecutionError as e:
+        result = f"Error: {e}"
+    return messages.Message.tool_result(tc.id, result)
+
+
+def validate_inputs(
+    user_input: str,
+    *,
+    max_tool_rounds: int,
+    max_retries: int,
+    timeout: float | None,
+) -> None:
+    """Check advance() arguments, before any I/O is done for the turn.
+
+    Raises:
+        ValidationError: If inputs are invalid
+    """
+    if not user_input or not user_input.strip():
+        raise exc.ValidationError("user_input", "must not be empty")
+    if max_tool_rounds < 1:
+        raise exc.ValidationError("max_tool_rounds", "must be at least 1")
+    if max_retries < 0:
+        raise exc.ValidationError("max_retries", "must be non-negative")
+    if timeout is not None and timeout <= 0:
+        raise exc.ValidationError("timeout", "must be positive")
+
+
 async def advance(
     *,
     model: str,
@@ -27,6 +80,8 @@ async def advance(
     max_retries: int = 3,
     timeout: float | None = 120.0,
     model_config: dict[str, Any] | None = None,
+    response_cache: llm.ResponseCache | None = None,
+    cache_system: bool = False,
 ) -> list[messages.Message]:
     """Run the LLM orchestration loop and return new messages.
 
@@ -43,6 +98,8 @@ async def advance(
         max_retries: LLM retry attempts on failure (default: 3)
         timeout: LLM request timeout in seconds (default: 120)
         model_config: LLM configuration (temperature, max_tokens, etc.)
+        response_cache: Optional cache of temperature 0 LLM responses
+        cache_system: Mark the system prompt for Anthropic prompt caching
 
     Returns:
         List of new messages created during this turn (user message,
@@ -52,15 +109,12 @@ async def advance(
         ValidationError: If inputs are invalid
         LLMError: If LLM call fails after retries
     """
-    # Validate inputs
-    if not user_input or not user_input.strip():
-        raise exc.ValidationError("user_input", "must not be empty")
-    if max_tool_rounds < 1:
-        raise exc.ValidationError("max_tool_rounds", "must be at least 1")
-    if max_retries < 0:
-        raise exc.ValidationError("max_retries", "must be non-negative")
-    if timeout is not None and timeout <= 0:
-        raise exc.ValidationError("timeout", "must be positive")
+    validate_inputs(
+        user_input,
+        max_tool_rounds=max_tool_rounds,
+        max_retries=max_retries,
+        timeout=timeout,
+    )
 
     # Build message list: history + new user message
     user_message = messages.Message.user(user_input)
@@ -73,6 +127,10 @@ async def advance(
     # Track new messages created in this turn
     new_messages: list[messages.Message] = [user_message]
 
+    # Results of read-only tool calls this turn, by (tool name, arguments), so a
+    # model repeating a call, in the same or a later round, doesn't run it again
+    read_only_results: dict[tuple[str, str], asyncio.Future[str]] = {}
+
     # Tool loop - each iteration is one LLM call, possibly followed by tool execution
     last_assistant_message: messages.Message | None = None
     llm_calls = 0
@@ -86,6 +144,8 @@ async def advance(
             max_retries=max_retries,
             timeout=timeout,
             model_config=model_config,
+            cache=response_cache,
+            cache_system=cache_system,
         )
         llm_calls += 1
         last_assistant_message = assistant_message
@@ -97,15 +157,8 @@ async def advance(
             break
 
         # Execute tool calls concurrently
-        async def execute_one(tc: messages.ToolCall) -> messages.Message:
-            try:
-                result = await mcp.execute(tc.name, tc.arguments)
-            except exc.ToolExecutionError as e:
-                result = f"Error: {e}"
-            return messages.Message.tool_result(tc.id, result)
-
         tool_results = await asyncio.gather(
-            *(execute_one(tc) for tc in assistant_message.tool_calls)
+            *(_execute_tool_call(mcp, tc, read_only_results) for tc in assistant_message.tool_calls)
         )
         for tool_result_message in tool_results:
             msgs.append(tool_result_message)
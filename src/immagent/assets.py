@@ -1,15 +1,28 @@
 """Base asset types for the immutable agent system."""
 
+import os
+import time
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from datetime import UTC, datetime
 from typing import Any, ClassVar, Self
-from uuid import UUID, uuid4
+from uuid import UUID
 
 
 def new_id() -> UUID:
-    """Generate a new UUID4 for an asset."""
-    return uuid4()
+    """Generate a new UUIDv7 (RFC 9562) for an asset.
+
+    The high 48 bits are the Unix time in milliseconds, so IDs created later
+    sort later and primary-key inserts append to the end of the B-tree
+    instead of landing on random pages.
+    """
+    unix_ms = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10))
+    value = (unix_ms & 0xFFFF_FFFF_FFFF) << 80 | rand
+    # Version 7 in bits 76-79, RFC 4122 variant (0b10) in bits 62-63
+    value = value & ~(0xF << 76) | 0x7 << 76
+    value = value & ~(0x3 << 62) | 0x2 << 62
+    return UUID(int=value)
 
 
 def now() -> datetime:
@@ -26,7 +39,9 @@ class Asset(ABC):
 
     Subclasses must define:
     - TABLE: The database table name
+    - COLUMNS: Comma-separated column list, in insert-parameter order
     - SELECT_SQL: SQL to select by ID (with $1 placeholder)
+    - INSERT_SQL: SQL to insert one row (parameters from to_insert_params())
     - from_row(): Class method to construct from a database row
     - to_insert_params(): Returns (sql, params) for insertion
     """
@@ -36,7 +51,9 @@ class Asset(ABC):
 
     # Subclasses override these
     TABLE: ClassVar[str]
+    COLUMNS: ClassVar[str]
     SELECT_SQL: ClassVar[str]
+    INSERT_SQL: ClassVar[str]
 
     @classmethod
     @abstractmethod
@@ -57,7 +74,10 @@ class SystemPrompt(Asset):
     content: str
 
     TABLE: ClassVar[str] = "text_assets"
-    SELECT_SQL: ClassVar[str] = "SELECT id, created_at, content FROM text_assets WHERE id = $1"
+    COLUMNS: ClassVar[str] = "id, created_at, content"
+    SELECT_SQL: ClassVar[str] = f"SELECT {COLUMNS} FROM text_assets WHERE id = $1"
+    INSERT_SQL: ClassVar[str] = f"""INSERT INTO text_assets ({COLUMNS})
+        VALUES ($1, $2, $3) ON CONFLICT (id) DO NOTHING"""
 
     @classmethod
     def create(cls, content: str) -> "SystemPrompt":
@@ -76,7 +96,6 @@ class SystemPrompt(Asset):
     def to_insert_params(self) -> tuple[str, tuple[Any, ...]]:
         """Return (INSERT SQL, parameters) for this asset."""
         return (
-            """INSERT INTO text_assets (id, created_at, content)
-               VALUES ($1, $2, $3) ON CONFLICT (id) DO NOTHING""",
+            self.INSERT_SQL,
             (self.id, self.created_at, self.content),
         )
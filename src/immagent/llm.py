@@ -1,10 +1,12 @@
 """LLM integration via LiteLLM."""
 
+import hashlib
+import json
+import threading
 import time
+from collections import OrderedDict
 from typing import Any
 
-import litellm
-
 import immagent.exceptions as exc
 import immagent.messages as messages
 from immagent.logging import logger
@@ -29,6 +31,97 @@ class Model:
     O1_MINI = "openai/o1-mini"
 
 
+def _provider(model: str) -> str:
+    """The LiteLLM provider prefix of a model string ("anthropic/claude-..." -> "anthropic")."""
+    return model.split("/")[0] if "/" in model else model
+
+
+def _system_message(model: str, system: str, cache_system: bool) -> dict[str, Any]:
+    """Build the system message, marked for provider prompt caching if asked to.
+
+    Anthropic only reuses a prompt prefix when it carries a cache_control
+    marker; OpenAI caches long prefixes automatically and needs nothing.
+    """
+    if cache_system and _provider(model) == "anthropic":
+        return {
+            "role": "system",
+            "content": [{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}],
+        }
+    return {"role": "system", "content": system}
+
+
+class ResponseCache:
+    """Exact-match cache of LLM responses, for deterministic (temperature 0) calls.
+
+    A call is served from the cache when its model, system prompt, messages,
+    tools and model config are identical to an earlier call's. Only calls
+    whose model_config sets temperature to 0 are cached; any other call can
+    legitimately return something different each time.
+
+    Entries are evicted least recently used first, and expire after ttl seconds.
+
+    Usage:
+        cache = ResponseCache()
+        store = await Store.connect("postgresql://...", response_cache=cache)
+    """
+
+    def __init__(self, *, maxsize: int = 1024, ttl: float = 3600.0):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        # key -> (expires_at, response); least recently used first
+        self._entries: OrderedDict[str, tuple[float, messages.Message]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def cacheable(model_config: dict[str, Any] | None) -> bool:
+        """Whether a call with this config is deterministic enough to cache."""
+        return model_config is not None and model_config.get("temperature") == 0
+
+    @staticmethod
+    def key(model: str, request: dict[str, Any]) -> str:
+        """Hash a request (the LiteLLM kwargs) into a cache key."""
+        payload = json.dumps({"model": model, "request": request}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> messages.Message | None:
+        """Return a fresh copy of the cached response, or None on a miss.
+
+        The copy reports 0 input and output tokens: nothing was billed for it.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, response = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        # Same content, but a new message with its own ID
+        return messages.Message.assistant(
+            content=response.content,
+            tool_calls=response.tool_calls,
+            input_tokens=0,
+            output_tokens=0,
+        )
+
+    def put(self, key: str, response: messages.Message) -> None:
+        """Cache a response, evicting the least recently used entries if full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self._ttl, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached responses."""
+        with self._lock:
+            self._entries.clear()
+
+
 async def complete(
     model: str,
     msgs: list[messages.Message],
@@ -37,6 +130,8 @@ async def complete(
     max_retries: int = 3,
     timeout: float | None = 120.0,
     model_config: dict[str, Any] | None = None,
+    cache: ResponseCache | None = None,
+    cache_system: bool = False,
 ) -> messages.Message:
     """Call an LLM via LiteLLM and return the response as a Message.
 
@@ -50,12 +145,17 @@ async def complete(
         max_retries: Number of retry attempts for transient failures (default: 3)
         timeout: Request timeout in seconds (default: 120). None for no timeout.
         model_config: Optional LLM configuration (temperature, max_tokens, top_p, etc.)
+        cache: Optional response cache; consulted and filled for temperature 0 calls
+        cache_system: Ask Anthropic to cache the system prompt prefix between
+            calls (default: False). Cache writes are billed at a premium and
+            reads at a fraction of the input price, so this pays off for long
+            system prompts reused across many calls.
 
     Returns:
         An assistant Message with the response
     """
     # Convert messages to LiteLLM format
-    litellm_messages = [{"role": "system", "content": system}]
+    litellm_messages = [_system_message(model, system, cache_system)]
     litellm_messages.extend(msg.to_litellm_dict() for msg in msgs)
 
     # Build kwargs
@@ -73,6 +173,16 @@ async def complete(
     if model_config:
         kwargs.update(model_config)
 
+    cache_key: str | None = None
+    if cache is not None and ResponseCache.cacheable(model_config):
+        # Retry and timeout settings don't change the answer
+        request = {k: v for k, v in kwargs.items() if k not in ("model", "num_retries", "timeout")}
+        cache_key = ResponseCache.key(model, request)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            logger.debug("LLM response cache hit: model=%s", model)
+            return cached
+
     # Call LiteLLM (handles retries with exponential backoff internally)
     logger.debug(
         "LLM request: model=%s, messages=%d, tools=%d",
@@ -82,14 +192,17 @@ async def complete(
     )
     start_time = time.perf_counter()
 
+    # Imported on first call: litellm takes a second or more to import, and
+    # nothing else in the package needs it
+    import litellm
+
     try:
         response = await litellm.acompletion(**kwargs)
     except Exception as e:
         # Handle specific error types with better messages
         error_type = type(e).__name__
         if error_type == "AuthenticationError":
-            # Extract provider from model string (e.g., "anthropic/claude-..." -> "anthropic")
-            provider = model.split("/")[0] if "/" in model else model
+            provider = _provider(model)
             env_var_hints = {
                 "anthropic": "ANTHROPIC_API_KEY",
                 "openai": "OPENAI_API_KEY",
@@ -100,8 +213,7 @@ async def complete(
             }
             hint = env_var_hints.get(provider, f"{provider.upper()}_API_KEY")
             raise exc.LLMError(
-                f"Authentication failed for {provider}. "
-                f"Check that {hint} is set and valid."
+                f"Authentication failed for {provider}. Check that {hint} is set and valid."
             ) from e
         elif error_type == "RateLimitError":
             raise exc.LLMError(f"Rate limit exceeded: {e}") from e
@@ -136,15 +248,21 @@ async def complete(
             )
             for tc in choice.tool_calls
         )
-        logger.debug("LLM requested %d tool call(s): %s", len(tool_calls), [tc.name for tc in tool_calls])
+        logger.debug(
+            "LLM requested %d tool call(s): %s", len(tool_calls), [tc.name for tc in tool_calls]
+        )
 
     # Extract token usage
     input_tokens = getattr(usage, "prompt_tokens", None) if usage else None
     output_tokens = getattr(usage, "completion_tokens", None) if usage else None
 
-    return messages.Message.assistant(
+    response_message = messages.Message.assistant(
         content=choice.content,
         tool_calls=tool_calls,
         input_tokens=input_tokens,
         output_tokens=output_tokens,
     )
+    if cache_key is not None:
+        assert cache is not None
+        cache.put(cache_key, response_message)
+    return response_message
@@ -1,16 +1,20 @@
 """MCP (Model Context Protocol) client integration for tool calling."""
 
+import asyncio
 import json
+import logging
 import time
 from contextlib import AsyncExitStack
-from typing import Any
-
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
+from typing import TYPE_CHECKING, Any
 
 import immagent.exceptions as exc
 from immagent.logging import logger
 
+# The MCP SDK (pydantic models, anyio) is imported on first use, so importing
+# immagent stays cheap for programs that never connect to a server.
+if TYPE_CHECKING:
+    from mcp import ClientSession
+
 
 def tool_to_openai_format(tool: dict[str, Any]) -> dict[str, Any]:
     """Convert an MCP tool definition to OpenAI function calling format."""
@@ -25,7 +29,7 @@ def tool_to_openai_format(tool: dict[str, Any]) -> dict[str, Any]:
 
 
 async def _execute_tool(
-    session: ClientSession,
+    session: "ClientSession",
     tool_name: str,
     arguments: dict[str, Any],
 ) -> str:
@@ -39,6 +43,8 @@ async def _execute_tool(
     Returns:
         The tool result as a string
     """
+    from mcp.types import TextContent
+
     result = await session.call_tool(tool_name, arguments)
 
     # MCP returns a list of content items
@@ -46,12 +52,11 @@ async def _execute_tool(
         # Concatenate all text content
         texts = []
         for item in result.content:
-            text = getattr(item, "text", None)
-            if text is not None:
-                texts.append(text)
+            if isinstance(item, TextContent):
+                texts.append(item.text)
             else:
-                # For non-text content, serialize to JSON
-                texts.append(json.dumps(item.model_dump()))
+                # For non-text content, let pydantic serialize straight to JSON
+                texts.append(item.model_dump_json())
         return "\n".join(texts)
     return ""
 
@@ -73,15 +78,23 @@ class MCPManager:
         await mcp.close()
     """
 
-    def __init__(self):
+    def __init__(self, *, max_concurrent_calls: int = 8):
+        """Create a manager with no servers connected.
+
+        Args:
+            max_concurrent_calls: Most tool calls run at once across all servers;
+                further calls wait their turn (default: 8)
+        """
+        if max_concurrent_calls < 1:
+            raise exc.ValidationError("max_concurrent_calls", "must be at least 1")
         self._exit_stack = AsyncExitStack()
-        self._sessions: dict[str, ClientSession] = {}
-        self._tools: dict[
-            str, tuple[str, dict[str, Any]]
-        ] = {}  # tool_name -> (server_key, tool_def)
+        self._call_slots = asyncio.Semaphore(max_concurrent_calls)
+        self._sessions: dict[str, "ClientSession"] = {}
+        self._tools: dict[str, tuple[str, int]] = {}  # tool_name -> (server_key, index)
+        self._tool_defs: list[dict[str, Any]] = []  # OpenAI-format defs, in discovery order
+        self._read_only: set[str] = set()  # tools annotated readOnlyHint by their server
 
     async def __aenter__(self) -> "MCPManager":
-        await self._exit_stack.__aenter__()
         return self
 
     async def __aexit__(
@@ -107,39 +120,65 @@ class MCPManager:
             args: Optional arguments to the command
             env: Optional environment variables
         """
+        from mcp import ClientSession, StdioServerParameters
+        from mcp.client.stdio import stdio_client
+
         server_params = StdioServerParameters(
             command=command,
             args=args or [],
             env=env,
         )
 
-        # Use exit stack for proper cleanup on errors
-        read, write = await self._exit_stack.enter_async_context(
-            stdio_client(server_params)
-        )
-        session = await self._exit_stack.enter_async_context(
-            ClientSession(read, write)
-        )
-        await session.initialize()
+        # Enter the transport and session on a per-server stack so a failure
+        # part-way through (e.g. initialize) tears down the subprocess right away
+        async with AsyncExitStack() as stack:
+            read, write = await stack.enter_async_context(stdio_client(server_params))
+            session = await stack.enter_async_context(ClientSession(read, write))
+            await session.initialize()
+            result = await session.list_tools()
+
+            # Connected: hand ownership of the server to the manager's stack
+            self._exit_stack.push_async_callback(stack.pop_all().aclose)
 
         self._sessions[server_key] = session
+        self._index_tools(server_key, result.tools)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "MCP connected: server=%s, tools=%d (%s)",
+                server_key,
+                len(result.tools),
+                [t.name for t in result.tools],
+            )
 
-        # Discover and index tools
-        result = await session.list_tools()
-        for tool in result.tools:
+    def _index_tools(self, server_key: str, tools: list[Any]) -> None:
+        """Record a server's discovered tools (MCP Tool models) for lookup."""
+        for tool in tools:
             tool_def = tool_to_openai_format(tool.model_dump())
-            self._tools[tool.name] = (server_key, tool_def)
-
-        logger.debug(
-            "MCP connected: server=%s, tools=%d (%s)",
-            server_key,
-            len(result.tools),
-            [t.name for t in result.tools],
-        )
+            existing = self._tools.get(tool.name)
+            if existing is None:
+                index = len(self._tool_defs)
+                self._tool_defs.append(tool_def)
+            else:
+                # Same tool name on a later server wins, as with the lookup table
+                index = existing[1]
+                self._tool_defs[index] = tool_def
+            self._tools[tool.name] = (server_key, index)
+            if tool.annotations is not None and tool.annotations.readOnlyHint:
+                self._read_only.add(tool.name)
+            else:
+                self._read_only.discard(tool.name)
 
     def get_all_tools(self) -> list[dict[str, Any]]:
         """Get all available tools across all connected servers."""
-        return [tool_def for _, tool_def in self._tools.values()]
+        return list(self._tool_defs)
+
+    def is_read_only(self, tool_name: str) -> bool:
+        """Whether the tool's server declared it read-only (no side effects).
+
+        Results of read-only tools may be reused for identical calls.
+        """
+        return tool_name in self._read_only
 
     async def execute(self, tool_name: str, arguments: str) -> str:
         """Execute a tool by name.
@@ -161,9 +200,7 @@ class MCPManager:
         server_key, _ = self._tools[tool_name]
         session = self._sessions.get(server_key)
         if session is None:
-            raise exc.ToolExecutionError(
-                tool_name, f"Server '{server_key}' is no longer connected"
-            )
+            raise exc.ToolExecutionError(tool_name, f"Server '{server_key}' is no longer connected")
 
         try:
             args_dict = json.loads(arguments) if arguments else {}
@@ -174,7 +211,8 @@ class MCPManager:
         start_time = time.perf_counter()
 
         try:
-            result = await _execute_tool(session, tool_name, args_dict)
+            async with self._call_slots:
+                result = await _execute_tool(session, tool_name, args_dict)
         except Exception as e:
             raise exc.ToolExecutionError(tool_name, str(e)) from e
 
@@ -193,3 +231,5 @@ class MCPManager:
         await self._exit_stack.aclose()
         self._sessions.clear()
         self._tools.clear()
+        self._tool_defs.clear()
+        self._read_only.clear()
@@ -1,18 +1,19 @@
 """Message types for conversations."""
 
-import json
 from dataclasses import dataclass
-from typing import Any, ClassVar, Literal
+from functools import cached_property
+from typing import Any, ClassVar, Literal, NamedTuple
 from uuid import UUID
 
 import immagent.assets as assets
 
 
-@dataclass(frozen=True)
-class ToolCall:
+class ToolCall(NamedTuple):
     """A tool call requested by the assistant.
 
     This is not an Asset because it's always embedded in a Message.
+    A NamedTuple rather than a dataclass: it's immutable either way, and
+    tuple construction/equality run in C, which adds up in tool-heavy turns.
     """
 
     id: str  # Tool call ID from the LLM
@@ -36,11 +37,12 @@ class Message(assets.Asset):
     output_tokens: int | None = None  # Token usage for assistant messages
 
     TABLE: ClassVar[str] = "messages"
-    SELECT_SQL: ClassVar[str] = """
-        SELECT id, created_at, role, content, tool_calls, tool_call_id,
-               input_tokens, output_tokens
-        FROM messages WHERE id = $1
-    """
+    COLUMNS: ClassVar[str] = (
+        "id, created_at, role, content, tool_calls, tool_call_id, input_tokens, output_tokens"
+    )
+    SELECT_SQL: ClassVar[str] = f"SELECT {COLUMNS} FROM messages WHERE id = $1"
+    INSERT_SQL: ClassVar[str] = f"""INSERT INTO messages ({COLUMNS})
+        VALUES ($1, $2, $3, $4, $5, $6, $7, $8) ON CONFLICT (id) DO NOTHING"""
 
     @classmethod
     def user(cls, content: str) -> "Message":
@@ -89,7 +91,7 @@ class Message(assets.Asset):
         if row["tool_calls"]:
             tool_calls = tuple(
                 ToolCall(id=tc["id"], name=tc["name"], arguments=tc["arguments"])
-                for tc in json.loads(row["tool_calls"])
+                for tc in row["tool_calls"]
             )
         return cls(
             id=row["id"],
@@ -106,13 +108,11 @@ class Message(assets.Asset):
         """Return (INSERT SQL, parameters) for this asset."""
         tool_calls_json = None
         if self.tool_calls:
-            tool_calls_json = json.dumps(
-                [{"id": tc.id, "name": tc.name, "arguments": tc.arguments} for tc in self.tool_calls]
-            )
+            tool_calls_json = [
+                {"id": tc.id, "name": tc.name, "arguments": tc.arguments} for tc in self.tool_calls
+            ]
         return (
-            """INSERT INTO messages (id, created_at, role, content, tool_calls,
-                                     tool_call_id, input_tokens, output_tokens)
-               VALUES ($1, $2, $3, $4, $5, $6, $7, $8) ON CONFLICT (id) DO NOTHING""",
+            self.INSERT_SQL,
             (
                 self.id,
                 self.created_at,
@@ -126,7 +126,15 @@ class Message(assets.Asset):
         )
 
     def to_litellm_dict(self) -> dict:
-        """Convert to LiteLLM message format."""
+        """Convert to LiteLLM message format.
+
+        The whole history is re-sent on every LLM call, so the dict is built
+        once per message and cached; each call returns a shallow copy of it.
+        """
+        return dict(self._litellm_dict)
+
+    @cached_property
+    def _litellm_dict(self) -> dict:
         msg: dict = {"role": self.role}
 
         if self.content is not None:
@@ -165,7 +173,10 @@ class Conversation(assets.Asset):
     message_ids: tuple[UUID, ...]
 
     TABLE: ClassVar[str] = "conversations"
-    SELECT_SQL: ClassVar[str] = "SELECT id, created_at, message_ids FROM conversations WHERE id = $1"
+    COLUMNS: ClassVar[str] = "id, created_at, message_ids"
+    SELECT_SQL: ClassVar[str] = f"SELECT {COLUMNS} FROM conversations WHERE id = $1"
+    INSERT_SQL: ClassVar[str] = f"""INSERT INTO conversations ({COLUMNS})
+        VALUES ($1, $2, $3) ON CONFLICT (id) DO NOTHING"""
 
     @classmethod
     def create(cls, message_ids: tuple[UUID, ...] | None = None) -> "Conversation":
@@ -188,8 +199,7 @@ class Conversation(assets.Asset):
     def to_insert_params(self) -> tuple[str, tuple[Any, ...]]:
         """Return (INSERT SQL, parameters) for this asset."""
         return (
-            """INSERT INTO conversations (id, created_at, message_ids)
-               VALUES ($1, $2, $3) ON CONFLICT (id) DO NOTHING""",
+            self.INSERT_SQL,
             (self.id, self.created_at, list(self.message_ids)),
         )
 
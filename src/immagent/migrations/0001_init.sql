@@ -0,0 +1,43 @@
+-- Text assets (system prompts, etc.)
+CREATE TABLE IF NOT EXISTS text_assets (
+    id UUID PRIMARY KEY,
+    created_at TIMESTAMPTZ NOT NULL,
+    content TEXT NOT NULL
+);
+
+-- Messages
+CREATE TABLE IF NOT EXISTS messages (
+    id UUID PRIMARY KEY,
+    created_at TIMESTAMPTZ NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT,
+    tool_calls JSONB,
+    tool_call_id TEXT,
+    input_tokens INTEGER,
+    output_tokens INTEGER
+);
+
+-- Conversations (ordered list of message IDs)
+CREATE TABLE IF NOT EXISTS conversations (
+    id UUID PRIMARY KEY,
+    created_at TIMESTAMPTZ NOT NULL,
+    message_ids UUID[] NOT NULL
+);
+
+-- Agents
+CREATE TABLE IF NOT EXISTS agents (
+    id UUID PRIMARY KEY,
+    created_at TIMESTAMPTZ NOT NULL,
+    name TEXT NOT NULL,
+    system_prompt_id UUID NOT NULL REFERENCES text_assets(id),
+    parent_id UUID REFERENCES agents(id) ON DELETE SET NULL,
+    conversation_id UUID NOT NULL REFERENCES conversations(id),
+    model TEXT NOT NULL,
+    metadata JSONB NOT NULL DEFAULT '{}',
+    model_config JSONB NOT NULL DEFAULT '{}'
+);
+
+-- Indexes for common lookups
+CREATE INDEX IF NOT EXISTS idx_agents_parent_id ON agents(parent_id);
+CREATE INDEX IF NOT EXISTS idx_agents_conversation_id ON agents(conversation_id);
+CREATE INDEX IF NOT EXISTS idx_agents_name ON agents(name);
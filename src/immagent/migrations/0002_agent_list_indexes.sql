@@ -0,0 +1,15 @@
+-- Newest-first pagination (list_agents, iter_agents) walks this instead of sorting
+CREATE INDEX IF NOT EXISTS idx_agents_created_at ON agents(created_at DESC, id);
+
+-- Substring name search (name ILIKE '%...%') can't use a btree index. The
+-- trigram index is optional: creating the pg_trgm extension needs privileges
+-- (or contrib packages) a managed database may not grant, in which case name
+-- search still works, just by scanning.
+DO $$
+BEGIN
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+    CREATE INDEX IF NOT EXISTS idx_agents_name_trgm ON agents USING gin (name gin_trgm_ops);
+EXCEPTION WHEN insufficient_privilege OR undefined_file THEN
+    RAISE NOTICE 'pg_trgm unavailable (%), skipping idx_agents_name_trgm', SQLERRM;
+END
+$$;
@@ -2,7 +2,6 @@
 
 from __future__ import annotations
 
-import json
 from dataclasses import dataclass, field
 from types import MappingProxyType
 from typing import TYPE_CHECKING, Any, ClassVar, Mapping
@@ -52,8 +51,13 @@ class PersistentAgent(assets.Asset):
     model_config: MappingProxyType[str, Any] = field(default_factory=_empty_mapping)
 
     TABLE: ClassVar[str] = "agents"
-    COLUMNS: ClassVar[str] = "id, created_at, name, system_prompt_id, parent_id, conversation_id, model, metadata, model_config"
+    COLUMNS: ClassVar[str] = (
+        "id, created_at, name, system_prompt_id, parent_id, conversation_id, model, "
+        "metadata, model_config"
+    )
     SELECT_SQL: ClassVar[str] = f"SELECT {COLUMNS} FROM agents WHERE id = $1"
+    INSERT_SQL: ClassVar[str] = f"""INSERT INTO agents ({COLUMNS})
+        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9) ON CONFLICT (id) DO NOTHING"""
 
     def __hash__(self) -> int:
         return hash(self.id)
@@ -69,16 +73,14 @@ class PersistentAgent(assets.Asset):
             parent_id=row["parent_id"],
             conversation_id=row["conversation_id"],
             model=row["model"],
-            metadata=MappingProxyType(json.loads(row["metadata"]) if row["metadata"] else {}),
-            model_config=MappingProxyType(json.loads(row["model_config"]) if row["model_config"] else {}),
+            metadata=MappingProxyType(row["metadata"] or {}),
+            model_config=MappingProxyType(row["model_config"] or {}),
         )
 
     def to_insert_params(self) -> tuple[str, tuple[Any, ...]]:
         """Return (INSERT SQL, parameters) for this asset."""
         return (
-            """INSERT INTO agents (id, created_at, name, system_prompt_id, parent_id,
-                                   conversation_id, model, metadata, model_config)
-               VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9) ON CONFLICT (id) DO NOTHING""",
+            self.INSERT_SQL,
             (
                 self.id,
                 self.created_at,
@@ -87,8 +89,8 @@ class PersistentAgent(assets.Asset):
                 self.parent_id,
                 self.conversation_id,
                 self.model,
-                json.dumps(dict(self.metadata)),
-                json.dumps(dict(self.model_config)),
+                dict(self.metadata),
+                dict(self.model_config),
             ),
         )
 
@@ -210,9 +212,14 @@ class PersistentAgent(assets.Asset):
                 return msg.content
         return None
 
-    async def lineage(self) -> list[PersistentAgent]:
-        """Get the chain of agents from root to this agent."""
-        return await get_store(self)._agent_lineage(self)
+    async def lineage(self, *, bypass_cache: bool = False) -> list[PersistentAgent]:
+        """Get the chain of agents from root to this agent.
+
+        Cached ancestors are reused, so ancestors deleted by another process
+        may still appear; pass bypass_cache=True to read the chain from the
+        database.
+        """
+        return await get_store(self)._agent_lineage(self, bypass_cache=bypass_cache)
 
     async def clone(self) -> PersistentAgent:
         """Create a sibling clone of this agent for branching.
@@ -11,6 +11,7 @@ import immagent.exceptions as exc
 from immagent.messages import Message
 
 if TYPE_CHECKING:
+    from immagent.llm import ResponseCache
     from immagent.mcp import MCPManager
 
 
@@ -155,6 +156,8 @@ class SimpleAgent:
         temperature: float | None = None,
         max_tokens: int | None = None,
         top_p: float | None = None,
+        response_cache: "ResponseCache | None" = None,
+        cache_system: bool = False,
     ) -> "SimpleAgent":
         """Process a user message and return a new agent with the response.
 
@@ -167,6 +170,8 @@ class SimpleAgent:
             temperature: Override temperature for this call
             max_tokens: Override max_tokens for this call
             top_p: Override top_p for this call
+            response_cache: Serve a repeated temperature 0 call from this cache
+            cache_system: Mark the system prompt for Anthropic prompt caching
 
         Returns:
             A new SimpleAgent with the updated conversation
@@ -191,6 +196,8 @@ class SimpleAgent:
             max_retries=max_retries,
             timeout=timeout,
             model_config=effective_config,
+            response_cache=response_cache,
+            cache_system=cache_system,
         )
 
         # Return new agent with updated messages
@@ -2,15 +2,22 @@
 
 The Store is the main interface for working with agents. It combines:
 - Database persistence (PostgreSQL)
-- In-memory weak reference caching
+- In-memory LRU caching
 - Agent lifecycle operations (create, advance, load)
 """
 
+import asyncio
+import contextlib
+import functools
+import json
 import threading
-import weakref
-from collections.abc import Mapping, MutableMapping
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Iterable, Mapping
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from pathlib import Path
 from types import MappingProxyType
-from typing import Any
+from typing import TYPE_CHECKING, Any
 from uuid import UUID
 
 import asyncpg
@@ -18,63 +25,165 @@ import asyncpg
 import immagent.advance as advance_mod
 import immagent.assets as assets
 import immagent.exceptions as exc
-import immagent.mcp as mcp_mod
+import immagent.llm as llm
 import immagent.messages as messages
-from immagent.persistent import PersistentAgent
 from immagent.logging import logger
+from immagent.persistent import PersistentAgent
 from immagent.registry import register_agent
 
-SCHEMA = """
--- Text assets (system prompts, etc.)
-CREATE TABLE IF NOT EXISTS text_assets (
-    id UUID PRIMARY KEY,
-    created_at TIMESTAMPTZ NOT NULL,
-    content TEXT NOT NULL
-);
-
--- Messages
-CREATE TABLE IF NOT EXISTS messages (
-    id UUID PRIMARY KEY,
-    created_at TIMESTAMPTZ NOT NULL,
-    role TEXT NOT NULL,
-    content TEXT,
-    tool_calls JSONB,
-    tool_call_id TEXT,
-    input_tokens INTEGER,
-    output_tokens INTEGER
-);
-
--- Conversations (ordered list of message IDs)
-CREATE TABLE IF NOT EXISTS conversations (
-    id UUID PRIMARY KEY,
-    created_at TIMESTAMPTZ NOT NULL,
-    message_ids UUID[] NOT NULL
-);
-
--- Agents
-CREATE TABLE IF NOT EXISTS agents (
-    id UUID PRIMARY KEY,
-    created_at TIMESTAMPTZ NOT NULL,
-    name TEXT NOT NULL,
-    system_prompt_id UUID NOT NULL REFERENCES text_assets(id),
-    parent_id UUID REFERENCES agents(id) ON DELETE SET NULL,
-    conversation_id UUID NOT NULL REFERENCES conversations(id),
-    model TEXT NOT NULL,
-    metadata JSONB NOT NULL DEFAULT '{}',
-    model_config JSONB NOT NULL DEFAULT '{}'
-);
-
--- Indexes for common lookups
-CREATE INDEX IF NOT EXISTS idx_agents_parent_id ON agents(parent_id);
-CREATE INDEX IF NOT EXISTS idx_agents_conversation_id ON agents(conversation_id);
-CREATE INDEX IF NOT EXISTS idx_agents_name ON agents(name);
+if TYPE_CHECKING:
+    from immagent.mcp import MCPManager
+
+# Schema migrations, applied in version order by init_schema. Files are named
+# NNNN_description.sql; never edit one that has shipped, add a new one instead.
+_MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+
+# pg_advisory_xact_lock key serializing concurrent init_schema calls
+_MIGRATIONS_LOCK_ID = 0x696D6D6167656E74  # "immagent"
+
+# Everything advance needs in one round trip, one row per asset, tagged by kind.
+# Columns are the union of SystemPrompt, Conversation and Message columns, so
+# each row can go straight to the matching from_row().
+_ADVANCE_INPUTS_SQL = """
+    SELECT 'system_prompt' AS kind, id, created_at, content,
+           NULL::uuid[] AS message_ids, NULL::text AS role, NULL::jsonb AS tool_calls,
+           NULL::text AS tool_call_id, NULL::integer AS input_tokens,
+           NULL::integer AS output_tokens
+    FROM text_assets WHERE id = $1
+    UNION ALL
+    SELECT 'conversation', id, created_at, NULL, message_ids, NULL, NULL, NULL, NULL, NULL
+    FROM conversations WHERE id = $2
+    UNION ALL
+    SELECT 'message', m.id, m.created_at, m.content, NULL, m.role, m.tool_calls,
+           m.tool_call_id, m.input_tokens, m.output_tokens
+    FROM conversations c
+    JOIN messages m ON m.id = ANY(c.message_ids)
+    WHERE c.id = $2
+"""
+
+# Summed assistant token usage per conversation, for token_usage_many()
+_TOKEN_USAGE_SQL = """
+    SELECT c.id,
+           COALESCE(SUM(m.input_tokens), 0) AS input_tokens,
+           COALESCE(SUM(m.output_tokens), 0) AS output_tokens
+    FROM conversations c
+    LEFT JOIN messages m ON m.id = ANY(c.message_ids) AND m.role = 'assistant'
+    WHERE c.id = ANY($1::uuid[])
+    GROUP BY c.id
 """
 
+PoolConnection = asyncpg.Connection | asyncpg.pool.PoolConnectionProxy
+
+
+class _ConnectionScope:
+    """A connection lazily acquired on first use and shared until the scope ends."""
+
+    conn: PoolConnection | None = None
+
+
+def _encode_jsonb(value: Any) -> bytes:
+    # Binary jsonb wire format: a version byte (1) followed by the JSON text
+    return b"\x01" + json.dumps(value).encode()
+
+
+def _decode_jsonb(data: bytes) -> Any:
+    return json.loads(data[1:])
+
+
+async def _init_connection(conn: asyncpg.Connection) -> None:
+    """Set up a new pool connection: JSONB columns map to Python objects."""
+    await conn.set_type_codec(
+        "jsonb",
+        encoder=_encode_jsonb,
+        decoder=_decode_jsonb,
+        schema="pg_catalog",
+        format="binary",
+    )
+
+
+# Tables in the order rows must be inserted to satisfy foreign keys
+_INSERT_ORDER = (
+    assets.SystemPrompt.TABLE,
+    messages.Message.TABLE,
+    messages.Conversation.TABLE,
+    PersistentAgent.TABLE,
+)
+
+
+def _insert_rank(table: str) -> int:
+    return _INSERT_ORDER.index(table) if table in _INSERT_ORDER else len(_INSERT_ORDER)
+
+
+def _list_agents_query(
+    name: str | None, limit: int | None, offset: int, *, with_total: bool = False
+) -> tuple[str, tuple[Any, ...]]:
+    """Build the (SQL, args) for a page of agents, newest first.
+
+    A limit of None means no limit. with_total adds a window count of all
+    matching rows as a "total" column.
+    """
+    columns = PersistentAgent.COLUMNS
+    if with_total:
+        columns += ", COUNT(*) OVER() AS total"
+    if name:
+        query = f"""
+            SELECT {columns} FROM agents
+            WHERE name ILIKE $1
+            ORDER BY created_at DESC
+            LIMIT $2 OFFSET $3
+        """
+        return query, (f"%{name}%", limit, offset)
+    query = f"""
+        SELECT {columns} FROM agents
+        ORDER BY created_at DESC
+        LIMIT $1 OFFSET $2
+    """
+    return query, (limit, offset)
+
+
+@functools.cache
+def _load_migrations() -> tuple[tuple[int, str], ...]:
+    """Read the bundled migrations as (version, sql) pairs, oldest first."""
+    migrations = [
+        (int(path.name.split("_", 1)[0]), path.read_text())
+        for path in _MIGRATIONS_DIR.glob("*.sql")
+    ]
+    return tuple(sorted(migrations))
+
+
+# Most pending saves the background writer commits in one transaction
+_WRITE_BATCH_SIZE = 256
+
+
+def _settle(future: "asyncio.Future[None]", error: BaseException | None = None) -> None:
+    """Resolve a pending save's future, unless its caller already gave up on it."""
+    if future.done():
+        return
+    if error is None:
+        future.set_result(None)
+    else:
+        future.set_exception(error)
+
+
+def _sum_token_usage(msgs: Iterable[messages.Message]) -> tuple[int, int]:
+    """Sum (input_tokens, output_tokens) over the assistant messages."""
+    input_tokens = output_tokens = 0
+    for m in msgs:
+        if m.role == "assistant":
+            input_tokens += m.input_tokens or 0
+            output_tokens += m.output_tokens or 0
+    return input_tokens, output_tokens
+
+
+def _rowcount(status: str) -> int:
+    """Extract the row count from a command status tag like 'DELETE 3'."""
+    return int(status.rsplit(" ", 1)[-1])
+
 
 class Store:
     """Unified cache and database access for agents.
 
-    The Store manages both persistence (PostgreSQL) and caching (weak refs).
+    The Store manages both persistence (PostgreSQL) and caching (bounded LRU).
     It's the main interface for creating, loading, and advancing agents.
 
     Usage:
@@ -88,12 +197,38 @@ class Store:
             agent = await agent.advance("Hello!")
     """
 
-    def __init__(self, pool: asyncpg.Pool):
+    def __init__(
+        self,
+        pool: asyncpg.Pool,
+        *,
+        cache_size: int = 10_000,
+        batch_writes: bool = False,
+        response_cache: llm.ResponseCache | None = None,
+        cache_system: bool = False,
+    ):
         self._pool = pool
-        self._cache: MutableMapping[UUID, assets.Asset] = weakref.WeakValueDictionary()
+        # Cache of deterministic LLM responses shared by all advances (see ResponseCache)
+        self._response_cache = response_cache
+        # Whether advances mark system prompts for Anthropic prompt caching
+        self._cache_system = cache_system
+        # LRU cache: most recently used at the end, evicted from the front.
+        # Assets are immutable and only cached once saved (or loaded), so an
+        # evicted entry is just reloaded from the database on next use.
+        self._cache: OrderedDict[UUID, assets.Asset] = OrderedDict()
+        self._cache_size = cache_size
+        # Connection scope of the current logical operation, if any (see _connection_scope)
+        self._scope: ContextVar[_ConnectionScope | None] = ContextVar(
+            f"immagent_store_scope_{id(self)}", default=None
+        )
         # threading.RLock (not asyncio.Lock) because: all locked operations are sync
         # dict ops with no await inside, and this protects against multi-threaded access
         self._lock = threading.RLock()
+        # Write-back batching (see _save): saves queued for the background writer
+        self._batch_writes = batch_writes
+        self._write_queue: asyncio.Queue[tuple[list[assets.Asset], asyncio.Future[None]]] | None = (
+            None
+        )
+        self._writer_task: asyncio.Task[None] | None = None
 
     @classmethod
     async def connect(
@@ -103,14 +238,32 @@ class Store:
         min_size: int = 2,
         max_size: int = 10,
         max_inactive_connection_lifetime: float = 300.0,
+        command_timeout: float | None = None,
+        statement_cache_size: int = 1024,
+        cache_size: int = 10_000,
+        batch_writes: bool = False,
+        response_cache: llm.ResponseCache | None = None,
+        cache_system: bool = False,
     ) -> "Store":
         """Connect to PostgreSQL and return a Store instance.
 
+        asyncpg is noticeably faster on uvloop; services that advance many
+        agents concurrently should run under uvloop.run(...) where available.
+
         Args:
             dsn: PostgreSQL connection string
             min_size: Minimum pool connections (default: 2)
             max_size: Maximum pool connections (default: 10)
             max_inactive_connection_lifetime: Idle timeout in seconds (default: 300)
+            command_timeout: Default per-query timeout in seconds (default: None, no timeout)
+            statement_cache_size: Prepared statements kept per connection (default: 1024)
+            cache_size: Maximum number of assets kept in the in-memory cache (default: 10000)
+            batch_writes: Commit saves from concurrent operations together, in one
+                transaction per batch, from a background task (default: False)
+            response_cache: Serve repeated temperature 0 LLM calls from this cache
+                instead of calling the LLM again (default: None, no caching)
+            cache_system: Mark system prompts for Anthropic prompt caching, which
+                pays off for long prompts reused across many turns (default: False)
 
         Returns:
             A Store instance ready to use
@@ -120,14 +273,32 @@ class Store:
             min_size=min_size,
             max_size=max_size,
             max_inactive_connection_lifetime=max_inactive_connection_lifetime,
+            command_timeout=command_timeout,
+            statement_cache_size=statement_cache_size,
+            # Have the server probe idle connections, so ones silently dropped by a
+            # NAT or load balancer are noticed instead of failing the next query
+            server_settings={"tcp_keepalives_idle": "30", "tcp_keepalives_interval": "10"},
+            init=_init_connection,
         )
         if pool is None:
             raise RuntimeError("Failed to create database connection pool")
-        return cls(pool)
-
+        return cls(
+            pool,
+            cache_size=cache_size,
+            batch_writes=batch_writes,
+            response_cache=response_cache,
+            cache_system=cache_system,
+        )
 
     async def close(self) -> None:
-        """Close the database connection pool."""
+        """Close the database connection pool, after finishing any queued saves."""
+        if self._writer_task is not None:
+            assert self._write_queue is not None
+            await self._write_queue.join()
+            self._writer_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._writer_task
+            self._writer_task = None
         await self._pool.close()
 
     async def ping(self) -> bool:
@@ -141,7 +312,7 @@ class Store:
                 logger.error("Database connection lost")
         """
         try:
-            async with self._pool.acquire() as conn:
+            async with self._conn() as conn:
                 await conn.fetchval("SELECT 1")
             return True
         except Exception:
@@ -154,24 +325,99 @@ class Store:
         await self.close()
 
     async def init_schema(self) -> None:
-        """Initialize the database schema (creates tables if not exist)."""
-        async with self._pool.acquire() as conn:
-            await conn.execute(SCHEMA)
+        """Bring the database schema up to date.
+
+        Applies the bundled migrations newer than the version recorded in the
+        schema_version table, each in the same transaction as its version row.
+        On an up-to-date database this is a single version lookup.
+        """
+        migrations = _load_migrations()
+        async with self._conn() as conn:
+            async with conn.transaction():
+                # Serialize concurrent callers (e.g. several workers starting at once)
+                await conn.execute("SELECT pg_advisory_xact_lock($1)", _MIGRATIONS_LOCK_ID)
+                await conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS schema_version (
+                        version INTEGER PRIMARY KEY,
+                        applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                    )
+                    """
+                )
+                current = await conn.fetchval(
+                    "SELECT COALESCE(MAX(version), 0) FROM schema_version"
+                )
+                for version, sql in migrations:
+                    if version <= current:
+                        continue
+                    await conn.execute(sql)
+                    await conn.execute("INSERT INTO schema_version (version) VALUES ($1)", version)
+                    logger.info("Applied schema migration %04d", version)
+
+    @asynccontextmanager
+    async def _connection_scope(self) -> AsyncIterator[None]:
+        """Share one pool connection across all queries made inside this block.
+
+        The connection is only acquired if something actually misses the
+        cache, and is released when the outermost scope exits. Don't hold
+        a scope across an LLM call.
+        """
+        if self._scope.get() is not None:
+            yield
+            return
+        scope = _ConnectionScope()
+        token = self._scope.set(scope)
+        try:
+            yield
+        finally:
+            self._scope.reset(token)
+            if scope.conn is not None:
+                await self._pool.release(scope.conn)
+
+    @asynccontextmanager
+    async def _conn(self) -> AsyncIterator[PoolConnection]:
+        """Get a connection: the enclosing scope's if any, else one from the pool."""
+        scope = self._scope.get()
+        if scope is None:
+            async with self._pool.acquire() as conn:
+                yield conn
+            return
+        if scope.conn is None:
+            scope.conn = await self._pool.acquire()
+        yield scope.conn
 
     # -- Cache operations --
 
     def _get_cached(self, asset_id: UUID) -> assets.Asset | None:
         with self._lock:
-            return self._cache.get(asset_id)
+            asset = self._cache.get(asset_id)
+            if asset is not None:
+                self._cache.move_to_end(asset_id)
+            return asset
+
+    def _get_cached_many(self, asset_ids: Iterable[UUID]) -> dict[UUID, assets.Asset]:
+        """Look up several IDs under a single lock acquisition; returns the hits."""
+        hits: dict[UUID, assets.Asset] = {}
+        with self._lock:
+            cache = self._cache
+            for asset_id in asset_ids:
+                asset = cache.get(asset_id)
+                if asset is not None:
+                    cache.move_to_end(asset_id)
+                    hits[asset_id] = asset
+        return hits
 
     def _cache_asset(self, asset: assets.Asset) -> None:
-        with self._lock:
-            self._cache[asset.id] = asset
+        self._cache_all(asset)
 
     def _cache_all(self, *assets_to_cache: assets.Asset) -> None:
         with self._lock:
+            cache = self._cache
             for asset in assets_to_cache:
-                self._cache[asset.id] = asset
+                cache[asset.id] = asset
+                cache.move_to_end(asset.id)
+            while len(cache) > self._cache_size:
+                cache.popitem(last=False)
 
     def clear_cache(self) -> None:
         """Clear the in-memory cache."""
@@ -185,17 +431,38 @@ class Store:
         cached = self._get_cached(row["id"])
         if cached is not None and isinstance(cached, PersistentAgent):
             return cached
+        return self._build_agent(row)
+
+    def _build_agent(self, row: asyncpg.Record) -> PersistentAgent:
+        """Build an agent from a row, register it with this store and cache it."""
         agent = PersistentAgent.from_row(row)
         register_agent(agent, self)
         self._cache_asset(agent)
         return agent
 
+    def _get_or_build_agents(self, rows: Iterable[asyncpg.Record]) -> list[PersistentAgent]:
+        """Like _get_or_build_agent for many rows, with one cache read and one cache write."""
+        rows = list(rows)
+        hits = self._get_cached_many(row["id"] for row in rows)
+        result: list[PersistentAgent] = []
+        built: list[PersistentAgent] = []
+        for row in rows:
+            agent = hits.get(row["id"])
+            if not isinstance(agent, PersistentAgent):
+                agent = PersistentAgent.from_row(row)
+                register_agent(agent, self)
+                built.append(agent)
+            result.append(agent)
+        if built:
+            self._cache_all(*built)
+        return result
+
     async def _get_system_prompt(self, asset_id: UUID) -> assets.SystemPrompt | None:
         cached = self._get_cached(asset_id)
         if cached is not None:
             return cached if isinstance(cached, assets.SystemPrompt) else None
 
-        async with self._pool.acquire() as conn:
+        async with self._conn() as conn:
             row = await conn.fetchrow(assets.SystemPrompt.SELECT_SQL, asset_id)
             if row:
                 asset = assets.SystemPrompt.from_row(row)
@@ -208,7 +475,7 @@ class Store:
         if cached is not None:
             return cached if isinstance(cached, messages.Message) else None
 
-        async with self._pool.acquire() as conn:
+        async with self._conn() as conn:
             row = await conn.fetchrow(messages.Message.SELECT_SQL, message_id)
             if row:
                 msg = messages.Message.from_row(row)
@@ -223,24 +490,19 @@ class Store:
         msgs_by_id: dict[UUID, messages.Message] = {}
         to_load: list[UUID] = []
 
+        hits = self._get_cached_many(message_ids)
         for mid in message_ids:
-            cached = self._get_cached(mid)
-            if cached is not None and isinstance(cached, messages.Message):
+            cached = hits.get(mid)
+            if isinstance(cached, messages.Message):
                 msgs_by_id[mid] = cached
             else:
                 to_load.append(mid)
 
         if to_load:
-            async with self._pool.acquire() as conn:
-                rows = await conn.fetch(
-                    """SELECT id, created_at, role, content, tool_calls, tool_call_id,
-                              input_tokens, output_tokens
-                       FROM messages WHERE id = ANY($1)""",
-                    to_load,
-                )
-            for row in rows:
-                msg = messages.Message.from_row(row)
-                self._cache_asset(msg)
+            rows = await self._fetch_by_ids(messages.Message, to_load)
+            loaded = [messages.Message.from_row(row) for row in rows]
+            self._cache_all(*loaded)
+            for msg in loaded:
                 msgs_by_id[msg.id] = msg
 
         # Verify all messages were found
@@ -255,7 +517,7 @@ class Store:
         if cached is not None:
             return cached if isinstance(cached, messages.Conversation) else None
 
-        async with self._pool.acquire() as conn:
+        async with self._conn() as conn:
             row = await conn.fetchrow(messages.Conversation.SELECT_SQL, conversation_id)
             if row:
                 conv = messages.Conversation.from_row(row)
@@ -263,34 +525,96 @@ class Store:
                 return conv
         return None
 
-    async def _get_agent(self, agent_id: UUID) -> PersistentAgent | None:
-        cached = self._get_cached(agent_id)
+    async def _get_agent(
+        self, agent_id: UUID, *, eager: bool = False, bypass_cache: bool = False
+    ) -> PersistentAgent | None:
+        """Get an agent, optionally prefetching its conversation and messages.
+
+        When eager and the agent isn't cached, its conversation is joined
+        into the agent query, leaving one more query for the messages.
+        With bypass_cache the agent is always read from the database.
+        """
+        cached = None if bypass_cache else self._get_cached(agent_id)
         if cached is not None:
-            return cached if isinstance(cached, PersistentAgent) else None
+            if not isinstance(cached, PersistentAgent):
+                return None
+            if eager:
+                await self._prefetch_conversations([cached])
+            return cached
 
-        async with self._pool.acquire() as conn:
-            row = await conn.fetchrow(PersistentAgent.SELECT_SQL, agent_id)
+        build = self._build_agent if bypass_cache else self._get_or_build_agent
+        if not eager:
+            async with self._conn() as conn:
+                row = await conn.fetchrow(PersistentAgent.SELECT_SQL, agent_id)
             if row:
-                agent = PersistentAgent.from_row(row)
-                register_agent(agent, self)
-                self._cache_asset(agent)
-                return agent
-        return None
+                return build(row)
+            return None
+
+        async with self._conn() as conn:
+            row = await conn.fetchrow(
+                f"""
+                SELECT a.*, c.created_at AS conversation_created_at, c.message_ids
+                FROM ({PersistentAgent.SELECT_SQL}) a
+                LEFT JOIN conversations c ON c.id = a.conversation_id
+                """,
+                agent_id,
+            )
+        if not row:
+            return None
+        agent = build(row)
+        known: list[messages.Conversation] = []
+        if row["message_ids"] is not None:
+            known.append(
+                messages.Conversation.from_row(
+                    {
+                        "id": row["conversation_id"],
+                        "created_at": row["conversation_created_at"],
+                        "message_ids": row["message_ids"],
+                    }
+                )
+            )
+        await self._prefetch_conversations([agent], known=known)
+        return agent
+
+    async def _fetch_by_ids(self, cls: type[assets.Asset], ids: list[UUID]) -> list[asyncpg.Record]:
+        """Fetch the rows of cls's table with the given IDs, in no particular order."""
+        async with self._conn() as conn:
+            if len(ids) == 1:
+                # Plain primary-key lookup; no array to encode
+                row = await conn.fetchrow(cls.SELECT_SQL, ids[0])
+                return [row] if row is not None else []
+            return await conn.fetch(
+                f"SELECT {cls.COLUMNS} FROM {cls.TABLE} WHERE id = ANY($1::uuid[])", ids
+            )
 
     # -- Save operations --
 
-    async def _save_one(
-        self, conn: asyncpg.Connection | asyncpg.pool.PoolConnectionProxy, asset: assets.Asset
+    async def _save_many(
+        self,
+        conn: PoolConnection,
+        assets_to_save: list[assets.Asset],
     ) -> None:
-        sql, params = asset.to_insert_params()
-        await conn.execute(sql, *params)
+        """Insert assets with one executemany per table, in foreign-key order."""
+        rows_by_table: dict[str, tuple[str, list[tuple[Any, ...]]]] = {}
+        for asset in assets_to_save:
+            sql, params = asset.to_insert_params()
+            rows_by_table.setdefault(asset.TABLE, (sql, []))[1].append(params)
+
+        for table in sorted(rows_by_table, key=_insert_rank):
+            sql, rows = rows_by_table[table]
+            if len(rows) == 1:
+                await conn.execute(sql, *rows[0])
+            else:
+                await conn.executemany(sql, rows)
 
     async def _save(self, *assets_to_save: assets.Asset) -> None:
         """Save assets to the database atomically (internal).
 
-        All assets are saved in a single transaction.
+        All assets are saved in a single transaction, then cached.
         When saving an PersistentAgent, its dependencies (system prompt, conversation)
-        are automatically saved first if they're in the cache.
+        are automatically saved first if they're in the cache. New dependencies
+        must be passed explicitly: the cache is bounded, so they may have been
+        evicted already.
         """
         if not assets_to_save:
             return
@@ -299,6 +623,24 @@ class Store:
         all_assets: list[assets.Asset] = []
         seen: set[UUID] = set()
 
+        # Look up every agent's dependencies in two batched cache reads
+        # (prompts and conversations, then their messages) instead of one
+        # lock round trip per ID.
+        agents_to_save = [a for a in assets_to_save if isinstance(a, PersistentAgent)]
+        deps = self._get_cached_many(
+            dep_id
+            for agent in agents_to_save
+            for dep_id in (agent.system_prompt_id, agent.conversation_id)
+        )
+        deps.update(
+            self._get_cached_many(
+                msg_id
+                for agent in agents_to_save
+                if isinstance(conv := deps.get(agent.conversation_id), messages.Conversation)
+                for msg_id in conv.message_ids
+            )
+        )
+
         for asset in assets_to_save:
             if asset.id in seen:
                 continue
@@ -306,18 +648,18 @@ class Store:
             # For agents, add dependencies first (order matters for foreign keys)
             if isinstance(asset, PersistentAgent):
                 # Add system prompt if in cache
-                prompt = self._get_cached(asset.system_prompt_id)
+                prompt = deps.get(asset.system_prompt_id)
                 if prompt is not None and prompt.id not in seen:
                     all_assets.append(prompt)
                     seen.add(prompt.id)
 
                 # Add conversation and its messages if in cache
-                conv = self._get_cached(asset.conversation_id)
+                conv = deps.get(asset.conversation_id)
                 if conv is not None and conv.id not in seen:
                     if isinstance(conv, messages.Conversation):
                         # Add messages first
                         for msg_id in conv.message_ids:
-                            msg = self._get_cached(msg_id)
+                            msg = deps.get(msg_id)
                             if msg is not None and msg.id not in seen:
                                 all_assets.append(msg)
                                 seen.add(msg.id)
@@ -327,15 +669,86 @@ class Store:
             all_assets.append(asset)
             seen.add(asset.id)
 
-        # Write to database
-        async with self._pool.acquire() as conn:
-            async with conn.transaction():
-                for asset in all_assets:
-                    await self._save_one(conn, asset)
+        # Write to database. A caller already holding a scoped connection writes
+        # on it directly: waiting on the writer while holding a pool connection
+        # could starve the writer of one.
+        scope = self._scope.get()
+        if self._batch_writes and (scope is None or scope.conn is None):
+            await self._enqueue_write(all_assets)
+        else:
+            await self._write(all_assets)
 
         # Cache them
         self._cache_all(*all_assets)
 
+    async def _write(self, assets_to_save: list[assets.Asset]) -> None:
+        """Save assets in their own transaction."""
+        async with self._conn() as conn:
+            async with conn.transaction():
+                await self._save_many(conn, assets_to_save)
+
+    async def _enqueue_write(self, assets_to_save: list[assets.Asset]) -> None:
+        """Hand assets to the background writer and wait until they're committed."""
+        if self._writer_task is None:
+            self._write_queue = asyncio.Queue()
+            self._writer_task = asyncio.create_task(self._writer_loop())
+        assert self._write_queue is not None
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._write_queue.put_nowait((assets_to_save, future))
+        await future
+
+    async def _writer_loop(self) -> None:
+        """Drain the write queue, committing whatever is pending as one batch."""
+        assert self._write_queue is not None
+        queue = self._write_queue
+        # The task inherited the context of whichever caller started it; don't
+        # write on that caller's scoped connection
+        self._scope.set(None)
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < _WRITE_BATCH_SIZE and not queue.empty():
+                batch.append(queue.get_nowait())
+            try:
+                await self._write_batch(batch)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def _write_batch(
+        self, batch: list[tuple[list[assets.Asset], asyncio.Future[None]]]
+    ) -> None:
+        """Commit a batch of saves in one transaction, settling each caller's future.
+
+        If the combined transaction fails, each save is retried on its own so
+        one bad save only fails its own caller.
+        """
+        combined: list[assets.Asset] = []
+        seen: set[UUID] = set()
+        for assets_to_save, _ in batch:
+            for asset in assets_to_save:
+                if asset.id not in seen:
+                    combined.append(asset)
+                    seen.add(asset.id)
+
+        try:
+            await self._write(combined)
+        except Exception as e:
+            if len(batch) == 1:
+                _settle(batch[0][1], e)
+                return
+            logger.warning("Batched write of %d saves failed, retrying individually", len(batch))
+            for assets_to_save, future in batch:
+                try:
+                    await self._write(assets_to_save)
+                except Exception as e:
+                    _settle(future, e)
+                else:
+                    _settle(future)
+            return
+
+        for _, future in batch:
+            _settle(future)
+
     # -- Public API --
 
     async def create_agent(
@@ -364,6 +777,66 @@ class Store:
         Raises:
             ValidationError: If any input is invalid
         """
+        agent, created = self._new_agent(
+            {},
+            name=name,
+            system_prompt=system_prompt,
+            model=model,
+            metadata=metadata,
+            model_config=model_config,
+        )
+
+        # Register agent with this store
+        register_agent(agent, self)
+
+        # Save the prompt and conversation with the agent (and cache them all)
+        await self._save(*created)
+
+        return agent
+
+    async def create_agents(self, specs: Iterable[Mapping[str, Any]]) -> list[PersistentAgent]:
+        """Create several agents, each with an empty conversation.
+
+        All agents are saved in one transaction, with one batched insert per
+        table, and cached. Agents given the same system prompt text share a
+        single stored prompt.
+
+        Args:
+            specs: The create_agent() keyword arguments for each agent
+
+        Returns:
+            The new agents, in the order of specs
+
+        Raises:
+            ValidationError: If any input is invalid (nothing is saved)
+        """
+        prompts: dict[str, assets.SystemPrompt] = {}
+        built = [self._new_agent(prompts, **spec) for spec in specs]
+        if not built:
+            return []
+
+        agents = [agent for agent, _ in built]
+        for agent in agents:
+            register_agent(agent, self)
+        await self._save(*(asset for _, created in built for asset in created))
+
+        return agents
+
+    def _new_agent(
+        self,
+        prompts: dict[str, assets.SystemPrompt],
+        *,
+        name: str,
+        system_prompt: str,
+        model: str,
+        metadata: Mapping[str, Any] | None = None,
+        model_config: Mapping[str, Any] | None = None,
+    ) -> tuple[PersistentAgent, list[assets.Asset]]:
+        """Validate and build a new agent (internal).
+
+        Reuses the prompt asset in prompts for the same text, adding new ones.
+        Returns the agent and the new assets to save with it.
+        """
         # Validate inputs
         if not name or not name.strip():
             raise exc.ValidationError("name", "must not be empty")
@@ -372,7 +845,9 @@ class Store:
         if not model or not model.strip():
             raise exc.ValidationError("model", "must not be empty")
 
-        prompt_asset = assets.SystemPrompt.create(system_prompt)
+        prompt_asset = prompts.get(system_prompt)
+        if prompt_asset is None:
+            prompt_asset = prompts[system_prompt] = assets.SystemPrompt.create(system_prompt)
         conversation = messages.Conversation.create()
         agent = PersistentAgent._create(
             name=name,
@@ -382,23 +857,20 @@ class Store:
             metadata=metadata,
             model_config=model_config,
         )
+        return agent, [prompt_asset, conversation, agent]
 
-        # Register agent with this store
-        register_agent(agent, self)
-
-        # Cache first (_save() looks up dependencies in cache)
-        self._cache_all(prompt_asset, conversation, agent)
-
-        # Save to database
-        await self._save(agent)
-
-        return agent
-
-    async def load_agent(self, agent_id: UUID) -> PersistentAgent:
+    async def load_agent(
+        self, agent_id: UUID, *, eager: bool = True, bypass_cache: bool = False
+    ) -> PersistentAgent:
         """Load an agent by ID.
 
         Args:
             agent_id: The agent's UUID
+            eager: Also prefetch the agent's conversation and messages, which
+                messages()/advance() need next anyway (default: True)
+            bypass_cache: Read the agent row from the database even if it's
+                cached, e.g. to check it was persisted. Unlike clear_cache(),
+                nothing else is evicted. (default: False)
 
         Returns:
             The agent
@@ -406,18 +878,23 @@ class Store:
         Raises:
             AgentNotFoundError: If no agent exists with the given ID
         """
-        agent = await self._get_agent(agent_id)
+        async with self._connection_scope():
+            agent = await self._get_agent(agent_id, eager=eager, bypass_cache=bypass_cache)
         if agent is None:
             raise exc.AgentNotFoundError(agent_id)
         return agent
 
-    async def load_agents(self, agent_ids: list[UUID]) -> list[PersistentAgent]:
+    async def load_agents(
+        self, agent_ids: list[UUID], *, eager: bool = True
+    ) -> list[PersistentAgent]:
         """Load multiple agents by ID in a single batch.
 
         More efficient than calling load_agent() multiple times.
 
         Args:
             agent_ids: List of agent UUIDs to load
+            eager: Also prefetch each agent's conversation and messages, so a
+                following messages()/advance() doesn't query per agent (default: True)
 
         Returns:
             List of agents in the same order as the input IDs
@@ -428,38 +905,133 @@ class Store:
         if not agent_ids:
             return []
 
-        agents_by_id: dict[UUID, PersistentAgent] = {}
-        to_load: list[UUID] = []
+        async with self._connection_scope():
+            agents_by_id: dict[UUID, PersistentAgent] = {}
+            to_load: list[UUID] = []
+
+            # Check cache first
+            hits = self._get_cached_many(agent_ids)
+            for aid in agent_ids:
+                cached = hits.get(aid)
+                if isinstance(cached, PersistentAgent):
+                    agents_by_id[aid] = cached
+                else:
+                    to_load.append(aid)
+
+            # Batch load from DB
+            if to_load:
+                rows = await self._fetch_by_ids(PersistentAgent, to_load)
+                for agent in self._get_or_build_agents(rows):
+                    agents_by_id[agent.id] = agent
+
+            # Verify all agents were found and return in order
+            result: list[PersistentAgent] = []
+            for aid in agent_ids:
+                if aid not in agents_by_id:
+                    raise exc.AgentNotFoundError(aid)
+                result.append(agents_by_id[aid])
+
+            if eager:
+                await self._prefetch_conversations(result)
+
+            return result
+
+    async def token_usage_many(self, agents: list[PersistentAgent]) -> list[tuple[int, int]]:
+        """Get the token usage of several agents in a single query.
+
+        More efficient than calling agent.token_usage() for each agent when
+        their messages aren't cached: the sums are computed in the database,
+        without loading any messages. Conversations already cached in full
+        are summed locally.
+
+        Args:
+            agents: The agents to report on
+
+        Returns:
+            (input_tokens, output_tokens) per agent, in the same order
+
+        Raises:
+            ConversationNotFoundError: If an agent's conversation is not found
+        """
+        usage: dict[UUID, tuple[int, int]] = {}
+        to_query: list[UUID] = []
+        conv_ids = {agent.conversation_id for agent in agents}
+        convs = self._get_cached_many(conv_ids)
+        for cid in conv_ids:
+            conv = convs.get(cid)
+            if isinstance(conv, messages.Conversation):
+                hits = self._get_cached_many(conv.message_ids)
+                cached_msgs: list[messages.Message] = []
+                for mid in conv.message_ids:
+                    msg = hits.get(mid)
+                    if not isinstance(msg, messages.Message):
+                        break
+                    cached_msgs.append(msg)
+                else:
+                    usage[cid] = _sum_token_usage(cached_msgs)
+                    continue
+            to_query.append(cid)
+
+        if to_query:
+            async with self._conn() as conn:
+                rows = await conn.fetch(_TOKEN_USAGE_SQL, to_query)
+            for row in rows:
+                usage[row["id"]] = (row["input_tokens"], row["output_tokens"])
+
+        result: list[tuple[int, int]] = []
+        for agent in agents:
+            if agent.conversation_id not in usage:
+                raise exc.ConversationNotFoundError(agent.conversation_id)
+            result.append(usage[agent.conversation_id])
+        return result
+
+    async def _prefetch_conversations(
+        self,
+        agents: list[PersistentAgent],
+        *,
+        known: list[messages.Conversation] | None = None,
+    ) -> None:
+        """Load the conversations and messages of several agents in two queries.
 
-        # Check cache first
-        for aid in agent_ids:
-            cached = self._get_cached(aid)
-            if cached is not None and isinstance(cached, PersistentAgent):
-                agents_by_id[aid] = cached
+        Anything already cached (or passed in as known) is skipped. Missing
+        rows are ignored here; the lazy accessors raise for them when they're
+        actually needed.
+        """
+        convs: dict[UUID, messages.Conversation] = {conv.id: conv for conv in known or ()}
+        convs_to_load: list[UUID] = []
+        conv_ids = {agent.conversation_id for agent in agents} - convs.keys()
+        hits = self._get_cached_many(conv_ids)
+        for cid in conv_ids:
+            cached = hits.get(cid)
+            if isinstance(cached, messages.Conversation):
+                convs[cid] = cached
             else:
-                to_load.append(aid)
+                convs_to_load.append(cid)
 
-        # Batch load from DB
-        if to_load:
-            async with self._pool.acquire() as conn:
-                rows = await conn.fetch(
-                    f"SELECT {PersistentAgent.COLUMNS} FROM agents WHERE id = ANY($1)",
-                    to_load,
-                )
+        if convs_to_load:
+            rows = await self._fetch_by_ids(messages.Conversation, convs_to_load)
             for row in rows:
-                agent = PersistentAgent.from_row(row)
-                register_agent(agent, self)
-                self._cache_asset(agent)
-                agents_by_id[agent.id] = agent
+                conv = messages.Conversation.from_row(row)
+                convs[conv.id] = conv
 
-        # Verify all agents were found and return in order
-        result: list[PersistentAgent] = []
-        for aid in agent_ids:
-            if aid not in agents_by_id:
-                raise exc.AgentNotFoundError(aid)
-            result.append(agents_by_id[aid])
+        msgs_by_id: dict[UUID, messages.Message] = {}
+        msgs_to_load: list[UUID] = []
+        for conv in convs.values():
+            hits = self._get_cached_many(conv.message_ids)
+            for mid in conv.message_ids:
+                cached = hits.get(mid)
+                if isinstance(cached, messages.Message):
+                    msgs_by_id[mid] = cached
+                else:
+                    msgs_to_load.append(mid)
+
+        if msgs_to_load:
+            rows = await self._fetch_by_ids(messages.Message, msgs_to_load)
+            for row in rows:
+                msg = messages.Message.from_row(row)
+                msgs_by_id[msg.id] = msg
 
-        return result
+        self._cache_all(*convs.values(), *msgs_by_id.values())
 
     async def delete(self, agent: PersistentAgent) -> None:
         """Delete an agent from the database and cache.
@@ -469,7 +1041,7 @@ class Store:
         Args:
             agent: The agent to delete
         """
-        async with self._pool.acquire() as conn:
+        async with self._conn() as conn:
             await conn.execute("DELETE FROM agents WHERE id = $1", agent.id)
 
         with self._lock:
@@ -492,26 +1064,42 @@ class Store:
         Returns:
             List of agents ordered by created_at descending (newest first)
         """
-        if name:
-            query = f"""
-                SELECT {PersistentAgent.COLUMNS} FROM agents
-                WHERE name ILIKE $1
-                ORDER BY created_at DESC
-                LIMIT $2 OFFSET $3
-            """
-            args = (f"%{name}%", limit, offset)
-        else:
-            query = f"""
-                SELECT {PersistentAgent.COLUMNS} FROM agents
-                ORDER BY created_at DESC
-                LIMIT $1 OFFSET $2
-            """
-            args = (limit, offset)
-
-        async with self._pool.acquire() as conn:
+        query, args = _list_agents_query(name, limit, offset)
+
+        async with self._conn() as conn:
             rows = await conn.fetch(query, *args)
 
-        return [self._get_or_build_agent(row) for row in rows]
+        return self._get_or_build_agents(rows)
+
+    async def iter_agents(
+        self,
+        *,
+        limit: int | None = None,
+        offset: int = 0,
+        name: str | None = None,
+        prefetch: int = 64,
+    ) -> AsyncIterator[PersistentAgent]:
+        """Iterate over agents, streaming rows from a server-side cursor.
+
+        Unlike list_agents(), rows are fetched in chunks of `prefetch` as you
+        iterate, so large result sets never have to fit in memory at once.
+        Holds a database connection (and read transaction) until iteration
+        finishes.
+
+        Args:
+            limit: Maximum number of agents to yield (default: no limit)
+            offset: Number of agents to skip (default: 0)
+            name: Optional name filter (substring match, case-insensitive)
+            prefetch: Rows fetched per round trip (default: 64)
+
+        Yields:
+            Agents ordered by created_at descending (newest first)
+        """
+        query, args = _list_agents_query(name, limit, offset)
+        async with self._conn() as conn:
+            async with conn.transaction(readonly=True):
+                async for row in conn.cursor(query, *args, prefetch=prefetch):
+                    yield self._get_or_build_agent(row)
 
     async def count_agents(self, *, name: str | None = None) -> int:
         """Count total number of agents.
@@ -522,7 +1110,7 @@ class Store:
         Returns:
             Total count of matching agents
         """
-        async with self._pool.acquire() as conn:
+        async with self._conn() as conn:
             if name:
                 count = await conn.fetchval(
                     "SELECT COUNT(*) FROM agents WHERE name ILIKE $1",
@@ -533,6 +1121,37 @@ class Store:
 
         return count or 0
 
+    async def list_and_count_agents(
+        self,
+        *,
+        limit: int = 100,
+        offset: int = 0,
+        name: str | None = None,
+    ) -> tuple[list[PersistentAgent], int]:
+        """List a page of agents together with the total match count.
+
+        Equivalent to calling list_agents() and count_agents() with the same
+        filter, but in one query (the total comes from a window count).
+
+        Args:
+            limit: Maximum number of agents to return (default: 100)
+            offset: Number of agents to skip (default: 0)
+            name: Optional name filter (substring match, case-insensitive)
+
+        Returns:
+            A tuple of (agents ordered by created_at descending, total count)
+        """
+        query, args = _list_agents_query(name, limit, offset, with_total=True)
+
+        async with self._conn() as conn:
+            rows = await conn.fetch(query, *args)
+
+        if not rows:
+            # Empty page: either no matches or offset is past the end
+            return [], await self.count_agents(name=name) if offset else 0
+
+        return self._get_or_build_agents(rows), rows[0]["total"]
+
     async def find_by_name(self, name: str) -> list[PersistentAgent]:
         """Find agents by exact name match.
 
@@ -542,13 +1161,14 @@ class Store:
         Returns:
             List of agents with the given name, ordered by created_at descending
         """
-        async with self._pool.acquire() as conn:
+        async with self._conn() as conn:
             rows = await conn.fetch(
-                f"SELECT {PersistentAgent.COLUMNS} FROM agents WHERE name = $1 ORDER BY created_at DESC",
+                f"SELECT {PersistentAgent.COLUMNS} FROM agents "
+                "WHERE name = $1 ORDER BY created_at DESC",
                 name,
             )
 
-        return [self._get_or_build_agent(row) for row in rows]
+        return self._get_or_build_agents(rows)
 
     async def gc(self) -> dict[str, int]:
         """Garbage collect orphaned assets.
@@ -559,37 +1179,39 @@ class Store:
         Returns:
             Dict with counts of deleted assets by type.
         """
-        async with self._pool.acquire() as conn:
+        async with self._conn() as conn:
             async with conn.transaction():
                 # Delete orphaned text_assets (system prompts not used by any agent)
-                deleted = await conn.fetch("""
+                status = await conn.execute("""
                     DELETE FROM text_assets t
                     WHERE NOT EXISTS (
                         SELECT 1 FROM agents a WHERE a.system_prompt_id = t.id
                     )
-                    RETURNING id
                 """)
-                text_assets_count = len(deleted)
+                text_assets_count = _rowcount(status)
 
                 # Delete orphaned conversations
-                deleted = await conn.fetch("""
+                status = await conn.execute("""
                     DELETE FROM conversations c
                     WHERE NOT EXISTS (
                         SELECT 1 FROM agents a WHERE a.conversation_id = c.id
                     )
-                    RETURNING id
                 """)
-                conversations_count = len(deleted)
-
-                # Delete orphaned messages
-                deleted = await conn.fetch("""
+                conversations_count = _rowcount(status)
+
+                # Delete orphaned messages. Unnest the live IDs once so the
+                # planner can hash anti-join instead of scanning every
+                # conversation's array per message.
+                status = await conn.execute("""
+                    WITH live AS (
+                        SELECT DISTINCT unnest(message_ids) AS id FROM conversations
+                    )
                     DELETE FROM messages m
                     WHERE NOT EXISTS (
-                        SELECT 1 FROM conversations c WHERE m.id = ANY(c.message_ids)
+                        SELECT 1 FROM live WHERE live.id = m.id
                     )
-                    RETURNING id
                 """)
-                messages_count = len(deleted)
+                messages_count = _rowcount(status)
 
         return {
             "text_assets": text_assets_count,
@@ -602,7 +1224,7 @@ class Store:
         agent: PersistentAgent,
         user_input: str,
         *,
-        mcp: mcp_mod.MCPManager | None = None,
+        mcp: "MCPManager | None" = None,
         max_tool_rounds: int = 10,
         max_retries: int = 3,
         timeout: float | None = 120.0,
@@ -614,6 +1236,14 @@ class Store:
 
         Use agent.advance() instead.
         """
+        # Reject bad arguments before loading anything from the database
+        advance_mod.validate_inputs(
+            user_input,
+            max_tool_rounds=max_tool_rounds,
+            max_retries=max_retries,
+            timeout=timeout,
+        )
+
         logger.info(
             "Advancing agent: id=%s, name=%s, model=%s",
             agent.id,
@@ -621,17 +1251,8 @@ class Store:
             agent.model,
         )
 
-        # Load conversation and system prompt
-        conversation = await self._get_conversation(agent.conversation_id)
-        if conversation is None:
-            raise exc.ConversationNotFoundError(agent.conversation_id)
-
-        system_prompt = await self._get_system_prompt(agent.system_prompt_id)
-        if system_prompt is None:
-            raise exc.SystemPromptNotFoundError(agent.system_prompt_id)
-
-        # Load existing messages
-        history = await self._get_messages(conversation.message_ids)
+        # Load system prompt, conversation and existing messages
+        system_prompt, conversation, history = await self._load_advance_inputs(agent)
 
         # Build effective model config: agent defaults + call overrides
         effective_config = dict(agent.model_config)
@@ -653,6 +1274,8 @@ class Store:
             max_retries=max_retries,
             timeout=timeout,
             model_config=effective_config,
+            response_cache=self._response_cache,
+            cache_system=self._cache_system,
         )
 
         # Create new conversation with all message IDs
@@ -661,9 +1284,8 @@ class Store:
         # Create new agent state
         new_agent = agent._evolve(new_conversation)
 
-        # Cache and save
-        self._cache_all(*new_messages, new_conversation, new_agent)
-        await self._save(new_agent)
+        # Save (and cache) the new messages, conversation and agent together
+        await self._save(*new_messages, new_conversation, new_agent)
 
         logger.info(
             "Agent advanced: old_id=%s, new_id=%s, new_messages=%d",
@@ -674,15 +1296,78 @@ class Store:
 
         return new_agent
 
+    async def _load_advance_inputs(
+        self, agent: PersistentAgent
+    ) -> tuple[assets.SystemPrompt, messages.Conversation, tuple[messages.Message, ...]]:
+        """Load an agent's system prompt, conversation and messages (internal).
+
+        Served from cache when everything is there; otherwise all three are
+        fetched together in a single query.
+        """
+        cached_prompt = self._get_cached(agent.system_prompt_id)
+        cached_conv = self._get_cached(agent.conversation_id)
+        if isinstance(cached_prompt, assets.SystemPrompt) and isinstance(
+            cached_conv, messages.Conversation
+        ):
+            hits = self._get_cached_many(cached_conv.message_ids)
+            cached_msgs: list[messages.Message] = []
+            for mid in cached_conv.message_ids:
+                msg = hits.get(mid)
+                if not isinstance(msg, messages.Message):
+                    break
+                cached_msgs.append(msg)
+            else:
+                return cached_prompt, cached_conv, tuple(cached_msgs)
+
+        async with self._conn() as conn:
+            rows = await conn.fetch(
+                _ADVANCE_INPUTS_SQL, agent.system_prompt_id, agent.conversation_id
+            )
+
+        system_prompt: assets.SystemPrompt | None = None
+        conversation: messages.Conversation | None = None
+        msgs_by_id: dict[UUID, messages.Message] = {}
+        hits = self._get_cached_many(row["id"] for row in rows)
+        for row in rows:
+            kind = row["kind"]
+            cached = hits.get(row["id"])
+            if kind == "message":
+                if isinstance(cached, messages.Message):
+                    msgs_by_id[row["id"]] = cached
+                else:
+                    msgs_by_id[row["id"]] = messages.Message.from_row(row)
+            elif kind == "conversation":
+                if isinstance(cached, messages.Conversation):
+                    conversation = cached
+                else:
+                    conversation = messages.Conversation.from_row(row)
+            elif isinstance(cached, assets.SystemPrompt):
+                system_prompt = cached
+            else:
+                system_prompt = assets.SystemPrompt.from_row(row)
+
+        if conversation is None:
+            raise exc.ConversationNotFoundError(agent.conversation_id)
+        if system_prompt is None:
+            raise exc.SystemPromptNotFoundError(agent.system_prompt_id)
+        for mid in conversation.message_ids:
+            if mid not in msgs_by_id:
+                raise exc.MessageNotFoundError(mid)
+
+        history = tuple(msgs_by_id[mid] for mid in conversation.message_ids)
+        self._cache_all(system_prompt, conversation, *history)
+        return system_prompt, conversation, history
+
     async def _agent_messages(self, agent: PersistentAgent) -> tuple[messages.Message, ...]:
         """Get all messages in an agent's conversation (internal).
 
         Use agent.get_messages() instead.
         """
-        conversation = await self._get_conversation(agent.conversation_id)
-        if conversation is None:
-            raise exc.ConversationNotFoundError(agent.conversation_id)
-        return await self._get_messages(conversation.message_ids)
+        async with self._connection_scope():
+            conversation = await self._get_conversation(agent.conversation_id)
+            if conversation is None:
+                raise exc.ConversationNotFoundError(agent.conversation_id)
+            return await self._get_messages(conversation.message_ids)
 
     async def _clone_agent(self, agent: PersistentAgent) -> PersistentAgent:
         """Create a clone of an agent for branching.
@@ -706,7 +1391,9 @@ class Store:
         await self._save(new_agent)
         return new_agent
 
-    async def _update_metadata(self, agent: PersistentAgent, metadata: Mapping[str, Any]) -> PersistentAgent:
+    async def _update_metadata(
+        self, agent: PersistentAgent, metadata: Mapping[str, Any]
+    ) -> PersistentAgent:
         """Create a new agent with updated metadata (internal).
 
         Use agent.with_metadata() instead.
@@ -727,14 +1414,32 @@ class Store:
         await self._save(new_agent)
         return new_agent
 
-    async def _agent_lineage(self, agent: PersistentAgent) -> list[PersistentAgent]:
+    async def _agent_lineage(
+        self, agent: PersistentAgent, *, bypass_cache: bool = False
+    ) -> list[PersistentAgent]:
         """Get the agent's lineage (internal).
 
-        Use agent.get_lineage() instead.
+        Use agent.lineage() instead.
 
-        Uses a recursive CTE for efficient single-query traversal.
+        Ancestors are taken from the cache while they're there; the rest of
+        the chain is fetched with a recursive CTE in a single query. The cache
+        is per process, so a cached prefix still includes ancestors another
+        process has deleted since; with bypass_cache the whole chain is read
+        from the database.
         """
-        async with self._pool.acquire() as conn:
+        # Walk up through cached ancestors (child-first)
+        chain: list[PersistentAgent] = []
+        current = None if bypass_cache else self._get_cached(agent.id)
+        while isinstance(current, PersistentAgent):
+            chain.append(current)
+            if current.parent_id is None:
+                # Reached the root without touching the database
+                chain.reverse()
+                return chain
+            current = self._get_cached(current.parent_id)
+
+        start_id = chain[-1].parent_id if chain else agent.id
+        async with self._conn() as conn:
             rows = await conn.fetch(
                 """
                 WITH RECURSIVE lineage AS (
@@ -749,13 +1454,18 @@ class Store:
                 )
                 SELECT * FROM lineage
                 """,
-                agent.id,
+                start_id,
             )
 
-        if not rows:
+        if not rows and not chain:
             raise exc.AgentNotFoundError(agent.id)
 
-        # Build agents and cache them (rows are child-first, reverse for root-first)
-        lineage = [self._get_or_build_agent(row) for row in rows]
+        # Build agents and cache them (rows are child-first, reverse for root-first).
+        # No rows for a cached chain means its top's parent was deleted since,
+        # which the database records as the chain ending there.
+        if bypass_cache:
+            lineage = [self._build_agent(row) for row in rows]
+        else:
+            lineage = chain + self._get_or_build_agents(rows)
         lineage.reverse()
         return lineage
@@ -3,13 +3,21 @@
 import pytest
 from testcontainers.postgres import PostgresContainer
 
+import immagent
 from immagent import Store
 
 
 @pytest.fixture(scope="session")
 def postgres_container():
-    """Start a PostgreSQL container for the test session."""
-    with PostgresContainer("postgres:16-alpine") as pg:
+    """Start a PostgreSQL container for the test session.
+
+    Durability is switched off: the database is thrown away with the
+    container, so commits needn't wait for fsync.
+    """
+    container = PostgresContainer("postgres:16-alpine").with_command(
+        "postgres -c fsync=off -c synchronous_commit=off -c full_page_writes=off"
+    )
+    with container as pg:
         yield pg
 
 
@@ -21,21 +29,54 @@ def database_url(postgres_container):
     return url.replace("postgresql+psycopg2", "postgresql")
 
 
-@pytest.fixture
-async def store(database_url):
-    """Create a Store and initialize schema.
+@pytest.fixture(scope="session")
+async def session_store(database_url):
+    """One Store (and connection pool) for the whole test session.
 
-    This fixture is function-scoped so each test gets a fresh schema.
-    Tables are dropped and recreated between tests.
-    Cache is per-store, so no global cleanup needed.
+    The schema is created once; tests get it through the store fixture,
+    which empties the tables after each test.
     """
     s = await Store.connect(database_url)
     await s.init_schema()
     yield s
-    # Clean up: drop all tables for next test
-    async with s._pool.acquire() as conn:
-        await conn.execute("DROP TABLE IF EXISTS agents CASCADE")
-        await conn.execute("DROP TABLE IF EXISTS conversations CASCADE")
-        await conn.execute("DROP TABLE IF EXISTS messages CASCADE")
-        await conn.execute("DROP TABLE IF EXISTS text_assets CASCADE")
     await s.close()
+
+
+@pytest.fixture
+async def store(session_store):
+    """The session Store, with empty tables and an empty cache.
+
+    TRUNCATE after each test is much cheaper than dropping and recreating
+    the schema, and the pool stays warm across tests.
+    """
+    yield session_store
+    async with session_store._pool.acquire() as conn:
+        await conn.execute("TRUNCATE agents, conversations, messages, text_assets CASCADE")
+    session_store.clear_cache()
+
+
+@pytest.fixture
+def make_agent(store):
+    """Create agents with the test defaults; keyword arguments override them.
+
+    The defaults are name "TestBot", a "You are helpful." system prompt and
+    Claude 3.5 Haiku.
+    """
+
+    async def make(**overrides):
+        return await store.create_agent(
+            **{
+                "name": "TestBot",
+                "system_prompt": "You are helpful.",
+                "model": immagent.Model.CLAUDE_3_5_HAIKU,
+                **overrides,
+            }
+        )
+
+    return make
+
+
+@pytest.fixture
+async def agent(make_agent):
+    """A freshly created (saved and cached) agent named "TestBot"."""
+    return await make_agent()
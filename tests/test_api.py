@@ -1,43 +1,71 @@
 """Tests for the public API."""
 
+import asyncio
 import uuid
 
 import pytest
 
 import immagent
-from immagent import Store
-from immagent.messages import Conversation
+from immagent import PersistentAgent, Store
+from immagent.messages import Conversation, Message
 
+# An ID no saved asset has: the nil UUID (new_id() makes UUIDv7s, never nil)
+_MISSING_ID = uuid.UUID(int=0)
 
-class TestCreateAgent:
-    async def test_creates_agent(self, store: Store):
-        """create_agent returns an agent."""
+
+async def _evolve(store: Store, agent: PersistentAgent, *messages: Message) -> PersistentAgent:
+    """Evolve agent onto a conversation of messages and save it, as advance() would."""
+    conv = Conversation.create(tuple(m.id for m in messages))
+    new_agent = agent._evolve(conv)
+    # One transaction for the messages, the conversation and the agent
+    await store._save(*messages, conv, new_agent)
+    return new_agent
+
+
+class TestInitSchema:
+    async def test_records_applied_migrations(self, store: Store):
+        """init_schema records every bundled migration version."""
+        from immagent.store import _load_migrations
+
+        async with store._pool.acquire() as conn:
+            versions = await conn.fetch("SELECT version FROM schema_version ORDER BY version")
+
+        assert [row["version"] for row in versions] == [v for v, _ in _load_migrations()]
+
+    async def test_idempotent(self, store: Store):
+        """Running init_schema again applies nothing and keeps existing data."""
         agent = await store.create_agent(
-            name="TestBot",
+            name="Bot",
             system_prompt="You are helpful.",
             model=immagent.Model.CLAUDE_3_5_HAIKU,
         )
 
-        assert agent.name == "TestBot"
+        await store.init_schema()
+        store.clear_cache()
 
-    async def test_accepts_string_model(self, store: Store):
-        """create_agent accepts a string model."""
-        agent = await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model="anthropic/claude-3-5-haiku-20241022",
-        )
+        assert (await store.load_agent(agent.id)).name == "Bot"
 
-        assert agent.model == "anthropic/claude-3-5-haiku-20241022"
 
-    async def test_accepts_model_enum(self, store: Store):
-        """create_agent accepts a Model enum."""
+class TestCreateAgent:
+    async def test_creates_agent(self, store: Store):
+        """create_agent returns an agent."""
         agent = await store.create_agent(
             name="TestBot",
             system_prompt="You are helpful.",
             model=immagent.Model.CLAUDE_3_5_HAIKU,
         )
 
+        assert agent.name == "TestBot"
+
+    @pytest.mark.parametrize(
+        "model",
+        ["anthropic/claude-3-5-haiku-20241022", immagent.Model.CLAUDE_3_5_HAIKU],
+        ids=["string", "constant"],
+    )
+    async def test_accepts_model(self, make_agent, model: str):
+        """create_agent accepts a LiteLLM model string or a Model constant."""
+        agent = await make_agent(model=model)
+
         assert agent.model == "anthropic/claude-3-5-haiku-20241022"
 
     async def test_agent_is_auto_saved(self, store: Store):
@@ -48,33 +76,100 @@ class TestCreateAgent:
             model=immagent.Model.CLAUDE_3_5_HAIKU,
         )
 
-        # Clear cache and reload from DB
-        store.clear_cache()
-        loaded = await store.load_agent(agent.id)
+        loaded = await store.load_agent(agent.id, bypass_cache=True)
 
+        assert loaded is not agent
         assert loaded.id == agent.id
         assert loaded.name == "TestBot"
 
 
-class TestSaveAndLoad:
-    async def test_save_and_load_agent(self, store: Store):
-        """Agent can be saved and loaded."""
-        agent = await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
+class TestCreateAgents:
+    async def test_creates_and_saves_all(self, store: Store):
+        """create_agents saves every agent, in order."""
+        agents = await store.create_agents(
+            dict(
+                name=f"Bot{i}",
+                system_prompt="You are helpful.",
+                model=immagent.Model.CLAUDE_3_5_HAIKU,
+            )
+            for i in range(3)
         )
 
+        store.clear_cache()
+        loaded = await store.load_agents([a.id for a in agents])
+
+        assert [a.name for a in loaded] == ["Bot0", "Bot1", "Bot2"]
+
+    async def test_shares_identical_prompts(self, store: Store):
+        """Agents with the same prompt text share one prompt asset."""
+        model = immagent.Model.CLAUDE_3_5_HAIKU
+        a, b, c = await store.create_agents(
+            [
+                dict(name="A", system_prompt="You are helpful.", model=model),
+                dict(name="B", system_prompt="You are helpful.", model=model),
+                dict(name="C", system_prompt="Different prompt.", model=model),
+            ]
+        )
+
+        assert a.system_prompt_id == b.system_prompt_id != c.system_prompt_id
+        assert a.conversation_id != b.conversation_id
+
+    async def test_invalid_spec_saves_nothing(self, store: Store):
+        """A validation error in any spec means no agent is created."""
+        model = immagent.Model.CLAUDE_3_5_HAIKU
+        with pytest.raises(immagent.ValidationError) as exc_info:
+            await store.create_agents(
+                [
+                    dict(name="Good", system_prompt="You are helpful.", model=model),
+                    dict(name="", system_prompt="You are helpful.", model=model),
+                ]
+            )
+
+        assert exc_info.value.field == "name"
+        assert await store.count_agents() == 0
+
+    async def test_more_agents_than_the_cache_holds(self, store: Store, database_url):
+        """Prompts and conversations evicted before the save are still written."""
+        async with await Store.connect(database_url, cache_size=4) as small:
+            agents = await small.create_agents(
+                dict(
+                    name=f"Bot{i}",
+                    system_prompt=f"You are helper {i}.",
+                    model=immagent.Model.CLAUDE_3_5_HAIKU,
+                )
+                for i in range(10)
+            )
+
+        loaded = await store.load_agents([a.id for a in agents])
+        prompts = [await store._get_system_prompt(a.system_prompt_id) for a in loaded]
+        assert [p.content for p in prompts] == [f"You are helper {i}." for i in range(10)]
+        assert [await a.messages() for a in loaded] == [()] * 10
+
+
+class TestSaveAndLoad:
+    async def test_save_and_load_agent(self, store: Store, agent: PersistentAgent):
+        """Agent can be saved and loaded."""
         # Auto-saved, so just load
         loaded = await store.load_agent(agent.id)
 
         assert loaded.id == agent.id
         assert loaded.name == "TestBot"
 
+    async def test_load_agent_prefetches_messages(self, store: Store, agent: PersistentAgent):
+        """load_agent caches the conversation and its messages by default."""
+        msg = Message.user("Hello")
+        agent2 = await _evolve(store, agent, msg)
+
+        store.clear_cache()
+        loaded = await store.load_agent(agent2.id)
+
+        assert store._get_cached(loaded.conversation_id) is not None
+        assert store._get_cached(msg.id) is not None
+
     async def test_load_nonexistent_agent(self, store: Store):
         """Loading nonexistent agent raises AgentNotFoundError."""
         with pytest.raises(immagent.AgentNotFoundError):
-            await store.load_agent(uuid.uuid4())
+            await store.load_agent(_MISSING_ID)
 
 
 class TestBatchLoading:
@@ -83,14 +178,8 @@ class TestBatchLoading:
         result = await store.load_agents([])
         assert result == []
 
-    async def test_load_agents_single(self, store: Store):
+    async def test_load_agents_single(self, store: Store, agent: PersistentAgent):
         """load_agents works with single agent."""
-        agent = await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-        )
-
         result = await store.load_agents([agent.id])
 
         assert len(result) == 1
@@ -98,20 +187,13 @@ class TestBatchLoading:
 
     async def test_load_agents_multiple(self, store: Store):
         """load_agents loads multiple agents in one batch."""
-        agent1 = await store.create_agent(
-            name="Bot1",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-        )
-        agent2 = await store.create_agent(
-            name="Bot2",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-        )
-        agent3 = await store.create_agent(
-            name="Bot3",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
+        agent1, agent2, agent3 = await store.create_agents(
+            dict(
+                name=f"Bot{i}",
+                system_prompt="You are helpful.",
+                model=immagent.Model.CLAUDE_3_5_HAIKU,
+            )
+            for i in (1, 2, 3)
         )
 
         result = await store.load_agents([agent1.id, agent2.id, agent3.id])
@@ -123,15 +205,13 @@ class TestBatchLoading:
 
     async def test_load_agents_preserves_order(self, store: Store):
         """load_agents returns agents in the same order as input IDs."""
-        agent1 = await store.create_agent(
-            name="Bot1",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-        )
-        agent2 = await store.create_agent(
-            name="Bot2",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
+        agent1, agent2 = await store.create_agents(
+            dict(
+                name=name,
+                system_prompt="You are helpful.",
+                model=immagent.Model.CLAUDE_3_5_HAIKU,
+            )
+            for name in ("Bot1", "Bot2")
         )
 
         # Request in reverse order
@@ -140,26 +220,35 @@ class TestBatchLoading:
         assert result[0].id == agent2.id
         assert result[1].id == agent1.id
 
-    async def test_load_agents_uses_cache(self, store: Store):
+    async def test_load_agents_uses_cache(self, store: Store, agent: PersistentAgent):
         """load_agents returns cached agents without DB hit."""
-        agent = await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-        )
-
         # Agent is cached, this should work even without DB
         result = await store.load_agents([agent.id])
 
         assert result[0] is agent  # Same object from cache
 
-    async def test_load_agents_from_db(self, store: Store):
-        """load_agents loads from DB when not cached."""
-        agent = await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
+    async def test_load_agents_mixes_cached_and_uncached(self, store: Store):
+        """load_agents reuses cached agents and loads only the missing ones."""
+        cached, evicted = await store.create_agents(
+            dict(
+                name=name,
+                system_prompt="You are helpful.",
+                model=immagent.Model.CLAUDE_3_5_HAIKU,
+            )
+            for name in ("Cached", "Evicted")
         )
+        with store._lock:
+            del store._cache[evicted.id]
+
+        result = await store.load_agents([evicted.id, cached.id])
+
+        assert [a.name for a in result] == ["Evicted", "Cached"]
+        assert result[1] is cached
+        assert result[0] is not evicted
+        assert store._get_cached(evicted.id) is result[0]
+
+    async def test_load_agents_from_db(self, store: Store, agent: PersistentAgent):
+        """load_agents loads from DB when not cached."""
         agent_id = agent.id
 
         store.clear_cache()
@@ -168,40 +257,82 @@ class TestBatchLoading:
         assert result[0].id == agent_id
         assert result[0].name == "TestBot"
 
-    async def test_load_agents_nonexistent_raises(self, store: Store):
-        """load_agents raises AgentNotFoundError if any ID not found."""
-        agent = await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-        )
+    async def test_load_agents_prefetches_conversation(self, store: Store, agent: PersistentAgent):
+        """load_agents caches each agent's conversation by default."""
+        agent_id = agent.id
+
+        store.clear_cache()
+        result = await store.load_agents([agent_id])
+
+        assert store._get_cached(result[0].conversation_id) is not None
+
+    async def test_load_agents_lazy(self, store: Store, agent: PersistentAgent):
+        """load_agents with eager=False loads only the agents."""
+        agent_id = agent.id
 
+        store.clear_cache()
+        result = await store.load_agents([agent_id], eager=False)
+
+        assert store._get_cached(result[0].conversation_id) is None
+
+    async def test_load_agents_nonexistent_raises(self, store: Store, agent: PersistentAgent):
+        """load_agents raises AgentNotFoundError if any ID not found."""
         with pytest.raises(immagent.AgentNotFoundError):
-            await store.load_agents([agent.id, uuid.uuid4()])
+            await store.load_agents([agent.id, _MISSING_ID])
+
+
+class TestCache:
+    async def test_cache_evicts_least_recently_used(self, store: Store):
+        """The cache drops the least recently used asset when full."""
+        from immagent.assets import SystemPrompt
+
+        small = Store(store._pool, cache_size=2)
+        p1 = SystemPrompt.create("one")
+        p2 = SystemPrompt.create("two")
+        p3 = SystemPrompt.create("three")
+
+        small._cache_all(p1, p2)
+        small._get_cached(p1.id)  # p1 is now most recently used
+        small._cache_all(p3)
+
+        assert small._get_cached(p1.id) is p1
+        assert small._get_cached(p2.id) is None
+        assert small._get_cached(p3.id) is p3
 
 
 class TestGetMessages:
-    async def test_empty_conversation(self, store: Store):
+    async def test_empty_conversation(self, agent: PersistentAgent):
         """New agent has no messages."""
-        agent = await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-        )
-
         messages = await agent.messages()
 
         assert messages == ()
 
 
+class TestLoadAdvanceInputs:
+    async def test_loads_from_db_in_order(self, store: Store, agent: PersistentAgent):
+        """With a cold cache, the prompt, conversation and messages come back in order."""
+        history = (
+            Message.user("Hello"),
+            Message.assistant("Hi there!"),
+            Message.user("How are you?"),
+        )
+        agent = await _evolve(store, agent, *history)
+
+        store.clear_cache()
+        system_prompt, conversation, msgs = await store._load_advance_inputs(agent)
+
+        assert system_prompt.id == agent.system_prompt_id
+        assert system_prompt.content == "You are helpful."
+        assert conversation.id == agent.conversation_id
+        assert conversation.message_ids == tuple(m.id for m in history)
+        assert [(m.id, m.role, m.content) for m in msgs] == [
+            (m.id, m.role, m.content) for m in history
+        ]
+
+
 class TestDelete:
-    async def test_delete_removes_agent(self, store: Store):
+    async def test_delete_removes_agent(self, store: Store, agent: PersistentAgent):
         """delete() removes agent from database."""
-        agent = await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-        )
         agent_id = agent.id
 
         await store.delete(agent)
@@ -210,14 +341,8 @@ class TestDelete:
         with pytest.raises(immagent.AgentNotFoundError):
             await store.load_agent(agent_id)
 
-    async def test_delete_removes_from_cache(self, store: Store):
+    async def test_delete_removes_from_cache(self, store: Store, agent: PersistentAgent):
         """delete() removes agent from cache."""
-        agent = await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-        )
-
         await store.delete(agent)
 
         # Cache should not have the agent
@@ -225,46 +350,90 @@ class TestDelete:
 
 
 class TestGC:
-    async def test_gc_cleans_orphaned_assets(self, store: Store):
-        """gc() removes assets not referenced by any agent."""
-        agent = await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-        )
-
-        # Delete the agent
+    @pytest.mark.parametrize(
+        ("clone", "expected"),
+        [
+            # Nothing else references the deleted agent's prompt and conversation
+            (False, {"text_assets": 1, "conversations": 1, "messages": 0}),
+            # The clone shares the same system prompt and conversation
+            (True, {"text_assets": 0, "conversations": 0, "messages": 0}),
+        ],
+        ids=["cleans_orphaned_assets", "preserves_shared_assets"],
+    )
+    async def test_gc(self, store: Store, agent: PersistentAgent, clone: bool, expected: dict):
+        """gc() removes assets no agent references and keeps shared ones."""
+        if clone:
+            await agent.clone()
         await store.delete(agent)
 
-        # Run gc
-        result = await store.gc()
+        assert await store.gc() == expected
+
+
+class TestBatchWrites:
+    async def test_concurrent_saves_are_committed(self, store: Store, database_url):
+        """With batch_writes, concurrent creates all land in the database."""
+        async with await Store.connect(database_url, batch_writes=True) as batched:
+            agents = await asyncio.gather(
+                *(
+                    batched.create_agent(
+                        name=f"Bot{i}",
+                        system_prompt="You are helpful.",
+                        model=immagent.Model.CLAUDE_3_5_HAIKU,
+                    )
+                    for i in range(20)
+                )
+            )
 
-        # Should have cleaned up the orphaned assets
-        assert result["text_assets"] == 1
-        assert result["conversations"] == 1
-        assert result["messages"] == 0  # No messages yet
+        store.clear_cache()
+        loaded = await store.load_agents([a.id for a in agents])
+        assert [a.name for a in loaded] == [f"Bot{i}" for i in range(20)]
+
+    async def test_failed_save_only_fails_its_caller(
+        self, store: Store, database_url, monkeypatch: pytest.MonkeyPatch
+    ):
+        """A save that violates a constraint doesn't fail the others in its batch."""
+        async with await Store.connect(database_url, batch_writes=True) as batched:
+            agent = await batched.create_agent(
+                name="Bot",
+                system_prompt="You are helpful.",
+                model=immagent.Model.CLAUDE_3_5_HAIKU,
+            )
+            # References a conversation that doesn't exist anywhere
+            orphan = PersistentAgent(
+                id=uuid.uuid4(),
+                created_at=agent.created_at,
+                name="Orphan",
+                system_prompt_id=agent.system_prompt_id,
+                parent_id=None,
+                conversation_id=_MISSING_ID,
+                model=agent.model,
+            )
+            msg = Message.user("Hello")
 
-    async def test_gc_preserves_shared_assets(self, store: Store):
-        """gc() keeps assets still referenced by other agents."""
-        agent1 = await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-        )
+            writes: list[set[uuid.UUID]] = []
+            write = batched._write
 
-        # Copy shares the same system prompt and conversation
-        await agent1.clone()
+            async def recording_write(assets_to_save):
+                writes.append({a.id for a in assets_to_save})
+                await write(assets_to_save)
 
-        # Delete the original
-        await store.delete(agent1)
+            monkeypatch.setattr(batched, "_write", recording_write)
 
-        # Run gc
-        result = await store.gc()
+            # _save doesn't await before enqueueing, so both saves are queued
+            # before the writer task wakes up and drains them as one batch
+            results = await asyncio.gather(
+                batched._save(orphan), batched._save(msg), return_exceptions=True
+            )
 
-        # Nothing should be deleted - agent2 still references them
-        assert result["text_assets"] == 0
-        assert result["conversations"] == 0
-        assert result["messages"] == 0
+        # The combined write fails, then each save is retried on its own
+        assert len(writes) == 3
+        assert {orphan.id, msg.id} <= writes[0]
+        assert orphan.id in writes[1] and msg.id not in writes[1]
+        assert msg.id in writes[2] and orphan.id not in writes[2]
+        assert isinstance(results[0], Exception)
+        assert results[1] is None
+        store.clear_cache()
+        assert [m.id for m in await store._get_messages((msg.id,))] == [msg.id]
 
 
 class TestListAgents:
@@ -275,15 +444,13 @@ class TestListAgents:
 
     async def test_list_agents_returns_all(self, store: Store):
         """list_agents returns all agents."""
-        await store.create_agent(
-            name="Bot1",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-        )
-        await store.create_agent(
-            name="Bot2",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
+        await store.create_agents(
+            dict(
+                name=name,
+                system_prompt="You are helpful.",
+                model=immagent.Model.CLAUDE_3_5_HAIKU,
+            )
+            for name in ("Bot1", "Bot2")
         )
 
         result = await store.list_agents()
@@ -292,12 +459,14 @@ class TestListAgents:
 
     async def test_list_agents_pagination(self, store: Store):
         """list_agents respects limit and offset."""
-        for i in range(5):
-            await store.create_agent(
+        await store.create_agents(
+            dict(
                 name=f"Bot{i}",
                 system_prompt="You are helpful.",
                 model=immagent.Model.CLAUDE_3_5_HAIKU,
             )
+            for i in range(5)
+        )
 
         # Get first 2
         result = await store.list_agents(limit=2)
@@ -313,15 +482,13 @@ class TestListAgents:
 
     async def test_list_agents_name_filter(self, store: Store):
         """list_agents filters by name substring."""
-        await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-        )
-        await store.create_agent(
-            name="OtherAgent",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
+        await store.create_agents(
+            dict(
+                name=name,
+                system_prompt="You are helpful.",
+                model=immagent.Model.CLAUDE_3_5_HAIKU,
+            )
+            for name in ("TestBot", "OtherAgent")
         )
 
         result = await store.list_agents(name="Bot")
@@ -329,18 +496,54 @@ class TestListAgents:
         assert len(result) == 1
         assert result[0].name == "TestBot"
 
-    async def test_list_agents_name_filter_case_insensitive(self, store: Store):
+    async def test_list_agents_name_filter_case_insensitive(self, store: Store, make_agent):
         """list_agents name filter is case-insensitive."""
-        await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-        )
+        await make_agent()
 
         result = await store.list_agents(name="testbot")
 
         assert len(result) == 1
 
+    async def test_list_agents_reuses_cached_and_caches_new(self, store: Store):
+        """list_agents returns cached instances and caches the ones it builds."""
+        cached, evicted = await store.create_agents(
+            dict(
+                name=name,
+                system_prompt="You are helpful.",
+                model=immagent.Model.CLAUDE_3_5_HAIKU,
+            )
+            for name in ("Cached", "Evicted")
+        )
+        with store._lock:
+            del store._cache[evicted.id]
+
+        result = {agent.name: agent for agent in await store.list_agents()}
+
+        assert result["Cached"] is cached
+        assert result["Evicted"] is not evicted
+        assert store._get_cached(evicted.id) is result["Evicted"]
+
+
+class TestIterAgents:
+    async def test_iter_agents_streams_all(self, store: Store, make_agent):
+        """iter_agents yields every agent, newest first."""
+        for i in range(5):
+            await make_agent(name=f"Bot{i}")
+
+        result = [agent async for agent in store.iter_agents(prefetch=2)]
+
+        assert [a.name for a in result] == ["Bot4", "Bot3", "Bot2", "Bot1", "Bot0"]
+
+    async def test_iter_agents_name_filter(self, store: Store, make_agent):
+        """iter_agents applies the name filter and limit."""
+        for name in ("TestBot", "OtherAgent", "TestBot2"):
+            await make_agent(name=name)
+
+        result = [agent async for agent in store.iter_agents(name="Bot", limit=1)]
+
+        assert len(result) == 1
+        assert result[0].name == "TestBot2"
+
 
 class TestCountAgents:
     async def test_count_agents_empty(self, store: Store):
@@ -350,15 +553,13 @@ class TestCountAgents:
 
     async def test_count_agents(self, store: Store):
         """count_agents returns correct count."""
-        await store.create_agent(
-            name="Bot1",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-        )
-        await store.create_agent(
-            name="Bot2",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
+        await store.create_agents(
+            dict(
+                name=f"Bot{i}",
+                system_prompt="You are helpful.",
+                model=immagent.Model.CLAUDE_3_5_HAIKU,
+            )
+            for i in (1, 2)
         )
 
         count = await store.count_agents()
@@ -367,15 +568,13 @@ class TestCountAgents:
 
     async def test_count_agents_with_filter(self, store: Store):
         """count_agents respects name filter."""
-        await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-        )
-        await store.create_agent(
-            name="OtherAgent",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
+        await store.create_agents(
+            dict(
+                name=name,
+                system_prompt="You are helpful.",
+                model=immagent.Model.CLAUDE_3_5_HAIKU,
+            )
+            for name in ("TestBot", "OtherAgent")
         )
 
         count = await store.count_agents(name="Bot")
@@ -383,14 +582,55 @@ class TestCountAgents:
         assert count == 1
 
 
+class TestListAndCountAgents:
+    async def test_list_and_count_empty(self, store: Store):
+        """list_and_count_agents returns no agents and zero total when empty."""
+        result, total = await store.list_and_count_agents()
+
+        assert result == []
+        assert total == 0
+
+    async def test_list_and_count_pagination(self, store: Store):
+        """list_and_count_agents returns one page plus the full total."""
+        await store.create_agents(
+            dict(
+                name=f"Bot{i}",
+                system_prompt="You are helpful.",
+                model=immagent.Model.CLAUDE_3_5_HAIKU,
+            )
+            for i in range(5)
+        )
+
+        result, total = await store.list_and_count_agents(limit=2)
+        assert len(result) == 2
+        assert total == 5
+
+        # Past the end: no rows, but the total is still reported
+        result, total = await store.list_and_count_agents(limit=2, offset=10)
+        assert result == []
+        assert total == 5
+
+    async def test_list_and_count_name_filter(self, store: Store):
+        """list_and_count_agents applies the name filter to the total."""
+        await store.create_agents(
+            dict(
+                name=name,
+                system_prompt="You are helpful.",
+                model=immagent.Model.CLAUDE_3_5_HAIKU,
+            )
+            for name in ("TestBot", "OtherAgent")
+        )
+
+        result, total = await store.list_and_count_agents(name="Bot")
+
+        assert len(result) == 1
+        assert total == 1
+
+
 class TestFindByName:
-    async def test_find_by_name_no_match(self, store: Store):
+    async def test_find_by_name_no_match(self, store: Store, make_agent):
         """find_by_name returns empty list when no match."""
-        await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-        )
+        await make_agent()
 
         result = await store.find_by_name("OtherBot")
 
@@ -398,20 +638,13 @@ class TestFindByName:
 
     async def test_find_by_name_exact_match(self, store: Store):
         """find_by_name returns agents with exact name."""
-        await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-        )
-        await store.create_agent(
-            name="TestBot",
-            system_prompt="Different prompt.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-        )
-        await store.create_agent(
-            name="OtherBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
+        model = immagent.Model.CLAUDE_3_5_HAIKU
+        await store.create_agents(
+            [
+                dict(name="TestBot", system_prompt="You are helpful.", model=model),
+                dict(name="TestBot", system_prompt="Different prompt.", model=model),
+                dict(name="OtherBot", system_prompt="You are helpful.", model=model),
+            ]
         )
 
         result = await store.find_by_name("TestBot")
@@ -419,13 +652,9 @@ class TestFindByName:
         assert len(result) == 2
         assert all(a.name == "TestBot" for a in result)
 
-    async def test_find_by_name_case_sensitive(self, store: Store):
+    async def test_find_by_name_case_sensitive(self, store: Store, make_agent):
         """find_by_name is case-sensitive."""
-        await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-        )
+        await make_agent()
 
         result = await store.find_by_name("testbot")
 
@@ -433,378 +662,233 @@ class TestFindByName:
 
 
 class TestClone:
-    async def test_clone_creates_new_id(self, store: Store):
+    async def test_clone_creates_new_id(self, agent: PersistentAgent):
         """clone() creates agent with new ID but same parent (sibling)."""
-        agent1 = await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-        )
+        agent2 = await agent.clone()
 
-        agent2 = await agent1.clone()
+        assert agent2.id != agent.id
+        assert agent2.name == agent.name
+        assert agent2.model == agent.model
+        assert agent2.parent_id == agent.parent_id  # Sibling, same parent
 
-        assert agent2.id != agent1.id
-        assert agent2.name == agent1.name
-        assert agent2.model == agent1.model
-        assert agent2.parent_id == agent1.parent_id  # Sibling, same parent
-
-    async def test_clone_keeps_conversation(self, store: Store):
+    async def test_clone_keeps_conversation(self, agent: PersistentAgent):
         """clone() keeps same conversation by default."""
-        agent1 = await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-        )
-
-        agent2 = await agent1.clone()
-
-        assert agent2.conversation_id == agent1.conversation_id
+        agent2 = await agent.clone()
 
+        assert agent2.conversation_id == agent.conversation_id
 
 
 class TestGetLineage:
-    async def test_single_agent_lineage(self, store: Store):
+    async def test_single_agent_lineage(self, agent: PersistentAgent):
         """Single agent's lineage is just itself."""
-        agent = await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-        )
-
         lineage = await agent.lineage()
 
         assert len(lineage) == 1
         assert lineage[0].id == agent.id
 
-    async def test_evolved_agent_lineage(self, store: Store):
+    async def test_evolved_agent_lineage(self, store: Store, agent: PersistentAgent):
         """Evolved agent's lineage includes parent."""
-        agent1 = await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-        )
-
-        # Manually evolve (simulating what advance would do)
-        conv = Conversation.create()
-        store._cache_all(conv)
-        agent2 = agent1._evolve(conv)
-        await store._save(agent2)
+        agent2 = await _evolve(store, agent)
 
         lineage = await agent2.lineage()
 
         assert len(lineage) == 2
-        assert lineage[0].id == agent1.id
+        assert lineage[0].id == agent.id
         assert lineage[1].id == agent2.id
 
+    async def test_lineage_fetches_uncached_ancestors(self, store: Store, agent: PersistentAgent):
+        """Ancestors evicted from the cache are loaded from the database."""
+        agent2 = await _evolve(store, agent)
+        with store._lock:
+            del store._cache[agent.id]
 
-class TestValidation:
-    """Tests for input validation."""
-
-    async def test_create_agent_empty_name(self, store: Store):
-        """create_agent rejects empty name."""
-        with pytest.raises(immagent.ValidationError) as exc_info:
-            await store.create_agent(
-                name="",
-                system_prompt="You are helpful.",
-                model=immagent.Model.CLAUDE_3_5_HAIKU,
-            )
-        assert exc_info.value.field == "name"
-
-    async def test_create_agent_whitespace_name(self, store: Store):
-        """create_agent rejects whitespace-only name."""
-        with pytest.raises(immagent.ValidationError) as exc_info:
-            await store.create_agent(
-                name="   ",
-                system_prompt="You are helpful.",
-                model=immagent.Model.CLAUDE_3_5_HAIKU,
-            )
-        assert exc_info.value.field == "name"
-
-    async def test_create_agent_empty_system_prompt(self, store: Store):
-        """create_agent rejects empty system_prompt."""
-        with pytest.raises(immagent.ValidationError) as exc_info:
-            await store.create_agent(
-                name="TestBot",
-                system_prompt="",
-                model=immagent.Model.CLAUDE_3_5_HAIKU,
-            )
-        assert exc_info.value.field == "system_prompt"
-
-    async def test_create_agent_empty_model(self, store: Store):
-        """create_agent rejects empty model."""
-        with pytest.raises(immagent.ValidationError) as exc_info:
-            await store.create_agent(
-                name="TestBot",
-                system_prompt="You are helpful.",
-                model="",
-            )
-        assert exc_info.value.field == "model"
-
-    async def test_advance_empty_input(self, store: Store):
-        """advance rejects empty user_input."""
-        agent = await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-        )
-        with pytest.raises(immagent.ValidationError) as exc_info:
-            await agent.advance("")
-        assert exc_info.value.field == "user_input"
-
-    async def test_advance_invalid_max_tool_rounds(self, store: Store):
-        """advance rejects max_tool_rounds < 1."""
-        agent = await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-        )
-        with pytest.raises(immagent.ValidationError) as exc_info:
-            await agent.advance("Hello", max_tool_rounds=0)
-        assert exc_info.value.field == "max_tool_rounds"
+        lineage = await agent2.lineage()
 
-    async def test_advance_invalid_max_retries(self, store: Store):
-        """advance rejects negative max_retries."""
-        agent = await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-        )
-        with pytest.raises(immagent.ValidationError) as exc_info:
-            await agent.advance("Hello", max_retries=-1)
-        assert exc_info.value.field == "max_retries"
+        assert [a.id for a in lineage] == [agent.id, agent2.id]
+        assert lineage[1] is agent2
 
-    async def test_advance_invalid_timeout(self, store: Store):
-        """advance rejects non-positive timeout."""
-        agent = await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-        )
-        with pytest.raises(immagent.ValidationError) as exc_info:
-            await agent.advance("Hello", timeout=0)
-        assert exc_info.value.field == "timeout"
+    async def test_lineage_stops_at_deleted_parent(self, store: Store, agent: PersistentAgent):
+        """A cached agent whose parent was deleted has a lineage of itself."""
+        agent2 = await _evolve(store, agent)
+        await store.delete(agent)
 
+        lineage = await agent2.lineage()
 
-class TestMetadata:
-    """Tests for agent metadata."""
+        assert [a.id for a in lineage] == [agent2.id]
 
-    async def test_create_agent_with_metadata(self, store: Store):
-        """Agent can be created with metadata."""
-        agent = await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-            metadata={"task_id": "abc123", "step": 1},
-        )
+    async def test_bypass_cache_sees_deletes_by_other_processes(
+        self, store: Store, agent: PersistentAgent
+    ):
+        """bypass_cache drops cached ancestors another process deleted."""
+        agent2 = await _evolve(store, agent)
+        async with store._pool.acquire() as conn:
+            await conn.execute("DELETE FROM agents WHERE id = $1", agent.id)
 
-        assert agent.metadata == {"task_id": "abc123", "step": 1}
+        assert [a.id for a in await agent2.lineage()] == [agent.id, agent2.id]
+        assert [a.id for a in await agent2.lineage(bypass_cache=True)] == [agent2.id]
 
-    async def test_create_agent_without_metadata(self, store: Store):
-        """Agent without metadata has empty dict."""
-        agent = await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-        )
 
-        assert agent.metadata == {}
+class TestValidation:
+    """Tests for input validation."""
 
-    async def test_metadata_persists(self, store: Store):
-        """Metadata is saved and loaded from database."""
-        agent = await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-            metadata={"key": "value"},
-        )
+    @pytest.mark.parametrize(
+        ("overrides", "field"),
+        [
+            ({"name": ""}, "name"),
+            ({"name": "   "}, "name"),
+            ({"system_prompt": ""}, "system_prompt"),
+            ({"model": ""}, "model"),
+        ],
+        ids=["empty_name", "whitespace_name", "empty_system_prompt", "empty_model"],
+    )
+    async def test_create_agent_rejects(self, make_agent, overrides: dict, field: str):
+        """create_agent rejects empty or blank name, system_prompt and model."""
+        with pytest.raises(immagent.ValidationError) as exc_info:
+            await make_agent(**overrides)
+        assert exc_info.value.field == field
+
+    @pytest.mark.parametrize(
+        ("user_input", "options", "field"),
+        [
+            ("", {}, "user_input"),
+            ("Hello", {"max_tool_rounds": 0}, "max_tool_rounds"),
+            ("Hello", {"max_retries": -1}, "max_retries"),
+            ("Hello", {"timeout": 0}, "timeout"),
+        ],
+        ids=["empty_input", "zero_max_tool_rounds", "negative_max_retries", "zero_timeout"],
+    )
+    async def test_advance_rejects(
+        self, agent: PersistentAgent, user_input: str, options: dict, field: str
+    ):
+        """advance rejects empty input and out-of-range loop/retry/timeout options."""
+        with pytest.raises(immagent.ValidationError) as exc_info:
+            await agent.advance(user_input, **options)
+        assert exc_info.value.field == field
 
+    async def test_advance_validates_before_loading(self, store: Store, agent: PersistentAgent):
+        """advance rejects bad input without loading the conversation."""
+        # Remove the agent's assets, so any load would fail
+        await store.delete(agent)
+        await store.gc()
         store.clear_cache()
-        loaded = await store.load_agent(agent.id)
-
-        assert loaded.metadata == {"key": "value"}
-
-    async def test_with_metadata_creates_new_agent(self, store: Store):
-        """with_metadata creates new agent with updated metadata."""
-        agent1 = await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-            metadata={"step": 1},
-        )
-
-        agent2 = await agent1.with_metadata({"step": 2})
-
-        assert agent2.id != agent1.id
-        assert agent2.parent_id == agent1.id
-        assert agent2.metadata == {"step": 2}
-        assert agent1.metadata == {"step": 1}  # Original unchanged
-
-    async def test_metadata_inherited_on_evolve(self, store: Store):
-        """Metadata is inherited when agent evolves."""
-        agent1 = await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-            metadata={"persistent": True},
-        )
 
-        # Manually evolve
-        conv = Conversation.create()
-        store._cache_all(conv)
-        agent2 = agent1._evolve(conv)
-        await store._save(agent2)
+        with pytest.raises(immagent.ValidationError) as exc_info:
+            await agent.advance("")
+        assert exc_info.value.field == "user_input"
 
-        assert agent2.metadata == {"persistent": True}
 
-    async def test_clone_preserves_metadata(self, store: Store):
-        """Clone preserves metadata."""
-        agent1 = await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-            metadata={"cloned": True},
-        )
+@pytest.mark.parametrize("attr", ["metadata", "model_config"])
+class TestAgentSettings:
+    """Tests shared by agent metadata and model_config."""
 
-        agent2 = await agent1.clone()
+    @pytest.fixture
+    def value(self, attr: str) -> dict:
+        """A sample non-empty value for the setting."""
+        return {
+            "metadata": {"task_id": "abc123", "step": 1},
+            "model_config": {"temperature": 0.7, "max_tokens": 1000},
+        }[attr]
 
-        assert agent2.metadata == {"cloned": True}
+    async def test_create_agent_with(self, make_agent, attr: str, value: dict):
+        """Agent can be created with the setting."""
+        agent = await make_agent(**{attr: value})
 
+        assert getattr(agent, attr) == value
 
-class TestModelConfig:
-    """Tests for model configuration."""
+    async def test_create_agent_without(self, agent: PersistentAgent, attr: str):
+        """Agent without the setting gets an empty dict."""
+        assert getattr(agent, attr) == {}
 
-    async def test_create_agent_with_model_config(self, store: Store):
-        """Agent can be created with model_config."""
-        agent = await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-            model_config={"temperature": 0.7, "max_tokens": 1000},
-        )
+    async def test_persists(self, store: Store, make_agent, attr: str, value: dict):
+        """The setting is saved and loaded from database."""
+        agent = await make_agent(**{attr: value})
 
-        assert agent.model_config == {"temperature": 0.7, "max_tokens": 1000}
+        loaded = await store.load_agent(agent.id, bypass_cache=True)
 
-    async def test_create_agent_without_model_config(self, store: Store):
-        """Agent without model_config gets empty dict."""
-        agent = await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-        )
+        assert getattr(loaded, attr) == value
 
-        assert agent.model_config == {}
+    async def test_inherited_on_evolve(self, store: Store, make_agent, attr: str, value: dict):
+        """The setting is inherited when agent evolves."""
+        agent1 = await make_agent(**{attr: value})
 
-    async def test_model_config_persists(self, store: Store):
-        """Model config is saved and loaded from database."""
-        agent = await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-            model_config={"temperature": 0.5},
-        )
+        agent2 = await _evolve(store, agent1)
 
-        store.clear_cache()
-        loaded = await store.load_agent(agent.id)
+        assert getattr(agent2, attr) == value
 
-        assert loaded.model_config == {"temperature": 0.5}
+    async def test_clone_preserves(self, make_agent, attr: str, value: dict):
+        """Clone preserves the setting."""
+        agent1 = await make_agent(**{attr: value})
 
-    async def test_model_config_inherited_on_evolve(self, store: Store):
-        """Model config is inherited when agent evolves."""
-        from immagent.messages import Conversation
+        agent2 = await agent1.clone()
 
-        agent1 = await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-            model_config={"temperature": 0.8},
-        )
+        assert getattr(agent2, attr) == value
 
-        # Manually evolve
-        conv = Conversation.create()
-        store._cache_all(conv)
-        agent2 = agent1._evolve(conv)
-        await store._save(agent2)
 
-        assert agent2.model_config == {"temperature": 0.8}
+class TestMetadata:
+    """Tests for agent metadata."""
 
-    async def test_clone_preserves_model_config(self, store: Store):
-        """Clone preserves model_config."""
-        agent1 = await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-            model_config={"temperature": 0.3},
-        )
+    async def test_with_metadata_creates_new_agent(self, make_agent):
+        """with_metadata creates new agent with updated metadata."""
+        agent1 = await make_agent(metadata={"step": 1})
 
-        agent2 = await agent1.clone()
+        agent2 = await agent1.with_metadata({"step": 2})
 
-        assert agent2.model_config == {"temperature": 0.3}
+        assert agent2.id != agent1.id
+        assert agent2.parent_id == agent1.id
+        assert agent2.metadata == {"step": 2}
+        assert agent1.metadata == {"step": 1}  # Original unchanged
 
 
 class TestTokenUsage:
     """Tests for token usage tracking."""
 
-    async def test_empty_conversation_zero_tokens(self, store: Store):
+    async def test_empty_conversation_zero_tokens(self, agent: PersistentAgent):
         """New agent with no messages has zero tokens."""
-        agent = await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-        )
-
         input_tokens, output_tokens = await agent.token_usage()
 
         assert input_tokens == 0
         assert output_tokens == 0
 
-    async def test_token_usage_sums_assistant_messages(self, store: Store):
-        """Token usage sums across assistant messages."""
-        from immagent.messages import Message
-
-        agent = await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-        )
-
-        # Manually add messages with token counts
+    @pytest.fixture
+    async def agent_with_tokens(self, store: Store, agent: PersistentAgent) -> PersistentAgent:
+        """The agent after a turn with user, tool and two assistant messages."""
         user_msg = Message.user("Hello")
-        asst_msg1 = Message.assistant("Hi!", input_tokens=10, output_tokens=5)
+        asst_msg1 = Message.assistant("Let me check.", input_tokens=10, output_tokens=5)
+        tool_msg = Message.tool_result("call_123", "Result")
         asst_msg2 = Message.assistant("How can I help?", input_tokens=15, output_tokens=8)
-        await store._save(user_msg, asst_msg1, asst_msg2)
-
-        conv = Conversation.create((user_msg.id, asst_msg1.id, asst_msg2.id))
-        store._cache_all(conv)
-        agent2 = agent._evolve(conv)
-        await store._save(agent2)
+        return await _evolve(store, agent, user_msg, asst_msg1, tool_msg, asst_msg2)
 
-        input_tokens, output_tokens = await agent2.token_usage()
+    async def test_token_usage_sums_assistant_messages(self, agent_with_tokens: PersistentAgent):
+        """Token usage sums across assistant messages."""
+        input_tokens, output_tokens = await agent_with_tokens.token_usage()
 
         assert input_tokens == 25  # 10 + 15
         assert output_tokens == 13  # 5 + 8
 
-    async def test_token_usage_ignores_user_and_tool_messages(self, store: Store):
+    async def test_token_usage_ignores_user_and_tool_messages(
+        self, agent_with_tokens: PersistentAgent
+    ):
         """Token usage only counts assistant messages."""
-        from immagent.messages import Message
+        msgs = await agent_with_tokens.messages()
 
-        agent = await store.create_agent(
-            name="TestBot",
-            system_prompt="You are helpful.",
-            model=immagent.Model.CLAUDE_3_5_HAIKU,
-        )
+        assert [m.role for m in msgs] == ["user", "assistant", "tool", "assistant"]
+        assert await agent_with_tokens.token_usage() == (25, 13)
 
-        # Add various message types
-        user_msg = Message.user("Hello")
-        asst_msg = Message.assistant("Let me check.", input_tokens=10, output_tokens=5)
-        tool_msg = Message.tool_result("call_123", "Result")
-        await store._save(user_msg, asst_msg, tool_msg)
+    async def test_token_usage_many_from_database(
+        self, store: Store, agent: PersistentAgent, agent_with_tokens: PersistentAgent
+    ):
+        """token_usage_many sums uncached conversations in the database."""
+        store.clear_cache()
+
+        usage = await store.token_usage_many([agent_with_tokens, agent, agent_with_tokens])
 
-        conv = Conversation.create((user_msg.id, asst_msg.id, tool_msg.id))
-        store._cache_all(conv)
-        agent2 = agent._evolve(conv)
-        await store._save(agent2)
+        assert usage == [(25, 13), (0, 0), (25, 13)]
+        assert store._get_cached(agent_with_tokens.conversation_id) is None
 
-        input_tokens, output_tokens = await agent2.token_usage()
+    async def test_token_usage_many_from_cache(
+        self, store: Store, agent: PersistentAgent, agent_with_tokens: PersistentAgent
+    ):
+        """token_usage_many agrees with token_usage() for cached conversations."""
+        usage = await store.token_usage_many([agent, agent_with_tokens])
 
-        assert input_tokens == 10
-        assert output_tokens == 5
+        assert usage == [await agent.token_usage(), await agent_with_tokens.token_usage()]
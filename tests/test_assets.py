@@ -1,9 +1,26 @@
 """Tests for asset persistence and retrieval."""
 
 from immagent import Store
-from immagent.persistent import PersistentAgent
-from immagent.assets import SystemPrompt
+from immagent.assets import SystemPrompt, new_id, now
 from immagent.messages import Conversation, Message, ToolCall
+from immagent.persistent import PersistentAgent
+
+
+class TestNewId:
+    def test_uuid_version_7(self):
+        """new_id generates RFC 9562 version 7 UUIDs."""
+        asset_id = new_id()
+
+        assert asset_id.version == 7
+
+    def test_time_ordered(self):
+        """IDs from different milliseconds sort by creation time."""
+        first = new_id()
+        second = new_id()
+        while second.int >> 80 == first.int >> 80:
+            second = new_id()
+
+        assert first < second
 
 
 class TestSystemPrompt:
@@ -49,9 +66,7 @@ class TestMessage:
 
     async def test_assistant_message_with_tool_calls(self, store: Store):
         """Assistant message with tool calls persists correctly."""
-        tool_calls = (
-            ToolCall(id="call_123", name="get_weather", arguments='{"city": "NYC"}'),
-        )
+        tool_calls = (ToolCall(id="call_123", name="get_weather", arguments='{"city": "NYC"}'),)
         msg = Message.assistant("Let me check the weather.", tool_calls=tool_calls)
 
         await store._save(msg)
@@ -77,6 +92,16 @@ class TestMessage:
         assert loaded.tool_call_id == "call_123"
         assert loaded.content == "Sunny, 72°F"
 
+    def test_litellm_dict_is_a_copy(self):
+        """Mutating a to_litellm_dict() result doesn't change the next one."""
+        msg = Message.user("Hello")
+
+        first = msg.to_litellm_dict()
+        first["content"] = "Changed"
+        first["name"] = "someone"
+
+        assert msg.to_litellm_dict() == {"role": "user", "content": "Hello"}
+
 
 class TestConversation:
     async def test_empty_conversation(self, store: Store):
@@ -94,16 +119,24 @@ class TestConversation:
         """Conversation preserves message order."""
         msg1 = Message.user("Hello")
         msg2 = Message.assistant("Hi there!")
-        await store._save(msg1, msg2)
-
         conv = Conversation.create((msg1.id, msg2.id))
-        await store._save(conv)
+
+        await store._save(msg1, msg2, conv)
         store.clear_cache()
         loaded = await store._get_conversation(conv.id)
 
         assert loaded is not None
         assert loaded.message_ids == (msg1.id, msg2.id)
 
+    def test_constructor_takes_message_ids(self):
+        """Conversation can be built directly from a tuple of message IDs."""
+        ids = (new_id(), new_id())
+
+        conv = Conversation(id=new_id(), created_at=now(), message_ids=ids)
+
+        assert conv.message_ids == ids
+        assert conv.with_messages(ids[0]).message_ids == (*ids, ids[0])
+
     async def test_with_messages_creates_new_conversation(self, store: Store):
         """with_messages returns a new conversation with new ID."""
         conv1 = Conversation.create()
@@ -122,8 +155,6 @@ class TestPersistentAgent:
 
         prompt = SystemPrompt.create("You are helpful.")
         conv = Conversation.create()
-        await store._save(prompt, conv)
-
         agent = PersistentAgent._create(
             name="TestBot",
             system_prompt_id=prompt.id,
@@ -131,7 +162,7 @@ class TestPersistentAgent:
             model="anthropic/claude-sonnet-4-20250514",
         )
         register_agent(agent, store)
-        await store._save(agent)
+        await store._save(prompt, conv, agent)
         store.clear_cache()
 
         loaded = await store._get_agent(agent.id)
@@ -147,8 +178,6 @@ class TestPersistentAgent:
 
         prompt = SystemPrompt.create("You are helpful.")
         conv1 = Conversation.create()
-        await store._save(prompt, conv1)
-
         agent1 = PersistentAgent._create(
             name="TestBot",
             system_prompt_id=prompt.id,
@@ -156,16 +185,14 @@ class TestPersistentAgent:
             model="anthropic/claude-sonnet-4-20250514",
         )
         register_agent(agent1, store)
-        await store._save(agent1)
 
         # Evolve with new conversation
         msg = Message.user("Hello")
-        await store._save(msg)
         conv2 = conv1.with_messages(msg.id)
-        await store._save(conv2)
-
         agent2 = agent1._evolve(conv2)
-        await store._save(agent2)
+
+        # _save() inserts in foreign-key order, so everything goes in one batch
+        await store._save(prompt, conv1, agent1, msg, conv2, agent2)
 
         assert agent2.id != agent1.id
         assert agent2.parent_id == agent1.id
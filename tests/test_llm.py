@@ -0,0 +1,120 @@
+"""Tests for LLM helpers that don't call a provider."""
+
+import sys
+from types import ModuleType, SimpleNamespace
+
+import immagent
+from immagent.llm import ResponseCache, _system_message, complete
+from immagent.messages import Message
+
+
+class TestSystemMessage:
+    def test_claude_system_prompt_marked_cacheable(self):
+        """Claude system prompts carry an ephemeral cache_control marker."""
+        msg = _system_message("anthropic/claude-3-5-haiku-20241022", "Be brief.", True)
+
+        assert msg["role"] == "system"
+        assert msg["content"] == [
+            {"type": "text", "text": "Be brief.", "cache_control": {"type": "ephemeral"}}
+        ]
+
+    def test_other_providers_unchanged(self):
+        """Providers that cache automatically get a plain system message."""
+        msg = _system_message("openai/gpt-4o", "Be brief.", True)
+
+        assert msg == {"role": "system", "content": "Be brief."}
+
+    def test_disabled(self):
+        """cache_system=False leaves the system message plain."""
+        msg = _system_message("anthropic/claude-3-5-haiku-20241022", "Be brief.", False)
+
+        assert msg == {"role": "system", "content": "Be brief."}
+
+    def test_matches_provider_prefix_not_model_name(self):
+        """Only the anthropic/ provider is marked, not any model named claude."""
+        msg = _system_message("bedrock/anthropic.claude-3-sonnet-20240229-v1:0", "Be brief.", True)
+
+        assert msg == {"role": "system", "content": "Be brief."}
+
+
+class TestResponseCache:
+    def test_only_temperature_zero_is_cacheable(self):
+        """Only calls that explicitly set temperature to 0 are cached."""
+        assert ResponseCache.cacheable({"temperature": 0})
+        assert not ResponseCache.cacheable({"temperature": 0.7})
+        assert not ResponseCache.cacheable({})
+        assert not ResponseCache.cacheable(None)
+
+    def test_key_is_order_independent(self):
+        """Keys don't depend on dict ordering."""
+        a = ResponseCache.key("m", {"messages": [], "temperature": 0})
+        b = ResponseCache.key("m", {"temperature": 0, "messages": []})
+
+        assert a == b
+        assert a != ResponseCache.key("other", {"messages": [], "temperature": 0})
+
+    def test_hit_returns_new_message_with_same_content(self):
+        """A hit is a new message (new ID) carrying the cached response, unbilled."""
+        cache = ResponseCache()
+        response = Message.assistant("4", input_tokens=10, output_tokens=1)
+        cache.put("k", response)
+
+        hit = cache.get("k")
+
+        assert hit is not None
+        assert hit.id != response.id
+        assert hit.content == "4"
+        assert (hit.input_tokens, hit.output_tokens) == (0, 0)
+
+    def test_miss(self):
+        """Unknown keys miss."""
+        assert ResponseCache().get("missing") is None
+
+    def test_expired_entries_miss(self):
+        """Entries older than ttl are dropped."""
+        cache = ResponseCache(ttl=0)
+        cache.put("k", Message.assistant("4"))
+
+        assert cache.get("k") is None
+        assert len(cache) == 0
+
+    def test_evicts_least_recently_used(self):
+        """A full cache drops the least recently used entry."""
+        cache = ResponseCache(maxsize=2)
+        cache.put("a", Message.assistant("a"))
+        cache.put("b", Message.assistant("b"))
+        cache.get("a")
+        cache.put("c", Message.assistant("c"))
+
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+        assert cache.get("c") is not None
+
+    async def test_complete_skips_llm_on_hit(self, monkeypatch):
+        """A repeated temperature 0 call is answered without calling LiteLLM."""
+        calls = []
+
+        async def acompletion(**kwargs):
+            calls.append(kwargs)
+            return SimpleNamespace(
+                choices=[SimpleNamespace(message=SimpleNamespace(content="4", tool_calls=None))],
+                usage=SimpleNamespace(prompt_tokens=10, completion_tokens=1),
+            )
+
+        fake_litellm = ModuleType("litellm")
+        fake_litellm.acompletion = acompletion  # type: ignore[attr-defined]
+        monkeypatch.setitem(sys.modules, "litellm", fake_litellm)
+        cache = ResponseCache()
+        args = ("anthropic/claude-3-5-haiku-20241022", [Message.user("2+2?")], "Be brief.")
+
+        first = await complete(*args, model_config={"temperature": 0}, cache=cache)
+        second = await complete(*args, model_config={"temperature": 0}, cache=cache)
+
+        assert len(calls) == 1
+        assert second.content == first.content == "4"
+        assert (first.input_tokens, first.output_tokens) == (10, 1)
+        assert (second.input_tokens, second.output_tokens) == (0, 0)
+
+    def test_exported(self):
+        """ResponseCache is part of the public API."""
+        assert immagent.ResponseCache is ResponseCache
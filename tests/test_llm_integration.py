@@ -9,7 +9,6 @@ from immagent import Store
 from immagent.llm import complete
 from immagent.messages import Message
 
-
 needs_api_key = pytest.mark.skipif(
     not os.environ.get("ANTHROPIC_API_KEY"),
     reason="ANTHROPIC_API_KEY not set",
@@ -105,3 +104,24 @@ async def test_token_tracking(store: Store):
     user_msg = messages[0]
     assert user_msg.input_tokens is None
     assert user_msg.output_tokens is None
+
+
+@needs_api_key
+async def test_response_cache_skips_repeated_call():
+    """A repeated temperature 0 call is answered from the response cache."""
+    cache = immagent.ResponseCache()
+    msgs = [Message.user("Convert 32F to Celsius. Reply with just the number.")]
+    kwargs = dict(
+        model="anthropic/claude-3-5-haiku-20241022",
+        msgs=msgs,
+        system="You are a helpful assistant. Be concise.",
+        model_config={"temperature": 0},
+        cache=cache,
+    )
+
+    first = await complete(**kwargs)
+    second = await complete(**kwargs)
+
+    assert len(cache) == 1
+    assert second.id != first.id
+    assert second.content == first.content
@@ -1,13 +1,18 @@
 """Tests for MCP integration."""
 
+import asyncio
 import os
 import sys
 from pathlib import Path
+from types import SimpleNamespace
 
 import pytest
 
 import immagent
+import immagent.mcp
+from immagent.advance import _execute_tool_call
 from immagent.mcp import MCPManager, tool_to_openai_format
+from immagent.messages import ToolCall
 
 
 class TestToolToOpenAIFormat:
@@ -56,6 +61,16 @@ class TestToolToOpenAIFormat:
         assert result["function"]["parameters"] == {"type": "object", "properties": {}}
 
 
+def fake_tool(name: str, description: str, read_only: bool = False) -> SimpleNamespace:
+    """A stand-in for an MCP Tool model, as returned by list_tools()."""
+    data = {"name": name, "description": description}
+    return SimpleNamespace(
+        name=name,
+        annotations=SimpleNamespace(readOnlyHint=read_only),
+        model_dump=lambda: data,
+    )
+
+
 class TestMCPManager:
     def test_init(self):
         """MCPManager initializes with empty state."""
@@ -69,6 +84,55 @@ class TestMCPManager:
 
         assert manager.get_all_tools() == []
 
+    def test_later_server_replaces_duplicate_tool(self):
+        """A tool name offered by two servers keeps one, updated, definition."""
+        manager = MCPManager()
+
+        manager._index_tools("first", [fake_tool("search", "Old", read_only=True)])
+        manager._index_tools("second", [fake_tool("search", "New"), fake_tool("fetch", "Fetch")])
+
+        tools = manager.get_all_tools()
+        assert [t["function"]["name"] for t in tools] == ["search", "fetch"]
+        assert tools[0]["function"]["description"] == "New"
+        assert manager._tools["search"] == ("second", 0)
+        assert manager.is_read_only("search") is False
+
+    def test_rejects_zero_concurrency(self):
+        """max_concurrent_calls must allow at least one call."""
+        with pytest.raises(immagent.ValidationError) as exc_info:
+            MCPManager(max_concurrent_calls=0)
+
+        assert exc_info.value.field == "max_concurrent_calls"
+
+    def test_unknown_tool_is_not_read_only(self):
+        """Tools not declared read-only by a server are never reused."""
+        manager = MCPManager()
+
+        assert manager.is_read_only("unknown_tool") is False
+
+    async def test_limits_concurrent_calls(self, monkeypatch: pytest.MonkeyPatch):
+        """No more than max_concurrent_calls tool calls run at once."""
+        running = 0
+        peak = 0
+
+        async def slow_tool(session, tool_name, arguments):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return "done"
+
+        monkeypatch.setattr(immagent.mcp, "_execute_tool", slow_tool)
+        manager = MCPManager(max_concurrent_calls=3)
+        manager._sessions["fake"] = object()  # type: ignore[assignment]
+        manager._tools["slow"] = ("fake", 0)
+
+        results = await asyncio.gather(*(manager.execute("slow", "{}") for _ in range(10)))
+
+        assert results == ["done"] * 10
+        assert peak == 3
+
     async def test_execute_unknown_tool(self):
         """execute raises ToolExecutionError for unknown tool."""
         manager = MCPManager()
@@ -80,6 +144,52 @@ class TestMCPManager:
         assert "Unknown tool" in str(exc_info.value)
 
 
+class FakeMCP:
+    """Stands in for MCPManager, counting executions per tool."""
+
+    def __init__(self, read_only: set[str]):
+        self._read_only = read_only
+        self.calls: list[str] = []
+
+    def is_read_only(self, tool_name: str) -> bool:
+        return tool_name in self._read_only
+
+    async def execute(self, tool_name: str, arguments: str) -> str:
+        self.calls.append(tool_name)
+        await asyncio.sleep(0)
+        return f"{tool_name}({arguments})"
+
+
+class TestReadOnlyReuse:
+    async def test_read_only_tool_runs_once(self):
+        """Identical read-only calls share one execution, in one round or across rounds."""
+        mcp = FakeMCP(read_only={"lookup"})
+        results: dict[tuple[str, str], asyncio.Future[str]] = {}
+
+        same_round = await asyncio.gather(
+            _execute_tool_call(mcp, ToolCall("a", "lookup", '{"q": 1}'), results),
+            _execute_tool_call(mcp, ToolCall("b", "lookup", '{"q": 1}'), results),
+        )
+        later_round = await _execute_tool_call(mcp, ToolCall("c", "lookup", '{"q": 1}'), results)
+
+        assert mcp.calls == ["lookup"]
+        assert [m.content for m in (*same_round, later_round)] == ['lookup({"q": 1})'] * 3
+        assert [m.tool_call_id for m in (*same_round, later_round)] == ["a", "b", "c"]
+
+    async def test_other_tools_run_every_time(self):
+        """Tools not declared read-only run for every call."""
+        mcp = FakeMCP(read_only=set())
+        results: dict[tuple[str, str], asyncio.Future[str]] = {}
+
+        await asyncio.gather(
+            _execute_tool_call(mcp, ToolCall("a", "send", '{"q": 1}'), results),
+            _execute_tool_call(mcp, ToolCall("b", "send", '{"q": 1}'), results),
+        )
+        await _execute_tool_call(mcp, ToolCall("c", "send", '{"q": 1}'), results)
+
+        assert mcp.calls == ["send"] * 3
+
+
 # Check if weather token is available for integration tests
 WEATHER_TOKEN = os.environ.get("WEATHER_TOKEN")
 